@@ -0,0 +1,135 @@
+"""
+Micro-benchmarks de find_download_links sobre páginas muy grandes.
+
+Genera listados de directorio con 1k, 10k y 100k enlaces (mezcla de href relativos y
+absolutos) y distintas proporciones de enlaces con extensión permitida, y compara los
+backends de análisis (y el análisis en streaming). Informa del tiempo por enlace y del
+pico de memoria asignada durante la extracción.
+
+Uso:
+    python benchmarks/bench_link_extraction.py
+    python benchmarks/bench_link_extraction.py --sizes 1000 10000 --hit-rates 0.1 0.9 --backends tokenizer lxml
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from bench_utils import format_table, quiet
+
+from link_parsers import PARSER_BACKENDS, compile_extension_matcher, resolve_parser_backend
+from main import find_download_links, find_download_links_streaming
+
+BASE_URL = "https://datos.example.org/publicaciones/listado/"
+ALLOWED_EXTENSIONS = [".pdf", ".zip", ".xlsx"]
+STREAMING_BACKEND = "streaming"
+STREAMING_CHUNK_SIZE = 64 * 1024
+
+
+def generate_listing(anchor_count, hit_rate):
+    """
+    Genera un listado de directorio al estilo de Apache/nginx.
+
+    Args:
+        anchor_count (int): Número de etiquetas <a>.
+        hit_rate (float): Proporción de enlaces con extensión permitida (0 a 1).
+
+    Returns:
+        str: El HTML de la página.
+    """
+    rows = []
+    for j in range(anchor_count):
+        if int((j + 1) * hit_rate) > int(j * hit_rate):
+            ext = ALLOWED_EXTENSIONS[j % len(ALLOWED_EXTENSIONS)]
+            name = f"informe_{j:06d}{ext.upper() if j % 7 == 0 else ext}"
+        else:
+            name = (f"seccion_{j:06d}/", f"nota_{j:06d}.html", f"?C=M;O={j}")[j % 3]
+        kind = j % 4
+        if kind == 0:
+            href = name
+        elif kind == 1:
+            href = f"./{name}"
+        elif kind == 2:
+            href = f"/publicaciones/listado/{name}"
+        else:
+            href = f"{BASE_URL}{name}"
+        rows.append(
+            f'<tr><td valign="top"><img src="/icons/file.gif" alt="[   ]"></td>'
+            f'<td><a href="{href}">{name}</a></td><td align="right">2026-01-01 10:00</td>'
+            f'<td align="right">{j % 900 + 1}K</td></tr>'
+        )
+    return (
+        "<!DOCTYPE HTML><html><head><title>Index of /publicaciones/listado</title></head><body>"
+        "<h1>Index of /publicaciones/listado</h1><table>\n" + "\n".join(rows) + "\n</table></body></html>"
+    )
+
+
+def extract(html, backend, matcher):
+    if backend == STREAMING_BACKEND:
+        chunks = (html[i:i + STREAMING_CHUNK_SIZE] for i in range(0, len(html), STREAMING_CHUNK_SIZE))
+        return list(find_download_links_streaming(chunks, BASE_URL, ALLOWED_EXTENSIONS, matcher))
+    return find_download_links(html, BASE_URL, ALLOWED_EXTENSIONS, backend, matcher)
+
+
+def measure(html, backend, matcher, repeat):
+    """
+    Mide una combinación de página y backend.
+
+    Returns:
+        tuple: (enlaces encontrados, mejor tiempo en segundos, pico de memoria en MB).
+    """
+    best = None
+    with quiet():
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            links = extract(html, backend, matcher)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        # La memoria se mide en una pasada aparte: tracemalloc ralentiza la extracción.
+        gc.collect()
+        tracemalloc.start()
+        extract(html, backend, matcher)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return len(links), best, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de find_download_links.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Número de enlaces de cada página generada.")
+    parser.add_argument("--hit-rates", type=float, nargs="+", default=[0.1, 0.9],
+                        help="Proporciones de enlaces con extensión permitida.")
+    parser.add_argument("--backends", nargs="+", choices=sorted(PARSER_BACKENDS) + [STREAMING_BACKEND],
+                        default=sorted(PARSER_BACKENDS) + [STREAMING_BACKEND],
+                        help="Backends a comparar.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medida (se toma la mejor).")
+    args = parser.parse_args()
+
+    backends = []
+    for backend in args.backends:
+        if backend != STREAMING_BACKEND and resolve_parser_backend(backend) != backend:
+            continue
+        backends.append(backend)
+
+    matcher = compile_extension_matcher(ALLOWED_EXTENSIONS)
+    rows = []
+    for size in args.sizes:
+        for hit_rate in args.hit_rates:
+            html = generate_listing(size, hit_rate)
+            print(f"Página de {size} enlaces ({len(html) / (1024 * 1024):.1f} MB), {hit_rate:.0%} con extensión permitida...")
+            for backend in backends:
+                links, seconds, peak_mb = measure(html, backend, matcher, args.repeat)
+                rows.append([backend, size, f"{hit_rate:.0%}", links, seconds * 1000,
+                             seconds / size * 1e6, peak_mb])
+
+    print()
+    print(format_table(
+        ["Backend", "Enlaces <a>", "Aciertos", "Encontrados", "ms", "µs/enlace", "Memoria pico (MB)"],
+        rows,
+    ))
+
+
+if __name__ == "__main__":
+    main()
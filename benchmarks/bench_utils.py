@@ -0,0 +1,68 @@
+"""
+Utilidades compartidas por los benchmarks: acceso a los módulos de src/, medición
+de memoria y tablas de resultados.
+"""
+import contextlib
+import io
+import os
+import sys
+
+SRC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_FOLDER not in sys.path:
+    sys.path.insert(0, SRC_FOLDER)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """
+    Devuelve el pico de memoria residente del proceso en MB.
+
+    Returns:
+        float or None: El pico desde el inicio del proceso, o None si el sistema no lo expone.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo expresa en KB; macOS, en bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silencia los mensajes del script mientras se mide."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def format_table(headers, rows):
+    """
+    Da formato de tabla de texto a una lista de filas.
+
+    Args:
+        headers (list): Títulos de las columnas.
+        rows (list): Filas; los float se muestran con dos decimales y None como '-'.
+
+    Returns:
+        str: La tabla.
+    """
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:,.2f}"
+        return str(value)
+
+    table = [[cell(value) for value in row] for row in rows]
+    widths = [max([len(str(header))] + [len(row[i]) for row in table]) for i, header in enumerate(headers)]
+    lines = [
+        "  ".join(str(header).ljust(width) for header, width in zip(headers, widths)),
+        "  ".join("-" * width for width in widths),
+    ]
+    for row in table:
+        lines.append("  ".join(value.rjust(width) if i else value.ljust(width)
+                               for i, (value, width) in enumerate(zip(row, widths))))
+    return "\n".join(lines)
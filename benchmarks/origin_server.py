@@ -0,0 +1,158 @@
+"""
+Servidor HTTP de origen sintético para los benchmarks.
+
+Genera páginas índice con un número configurable de enlaces y sirve archivos de
+tamaño configurable, con latencia y límite de ancho de banda opcionales. Se ejecuta
+en un hilo del propio proceso, escuchando en 127.0.0.1 y en un puerto libre.
+"""
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WRITE_CHUNK_SIZE = 64 * 1024
+FILLER_BLOCK = bytes(range(256)) * 256
+
+
+class SyntheticOrigin:
+    """
+    Origen HTTP sintético.
+
+    Rutas:
+        /page/<i>.html: página índice 'i' con 'link_count' enlaces. Tres de cada cuatro
+            apuntan a archivos con extensiones de 'extensions' (la mitad con rutas relativas
+            y la otra mitad absolutas); el resto apunta a páginas HTML.
+        /files/<nombre>: un archivo de 'file_size' bytes.
+
+    Args:
+        page_count (int): Número de páginas índice.
+        link_count (int): Enlaces por página.
+        file_size (int): Tamaño de cada archivo en bytes.
+        latency (float): Segundos de espera antes de cada respuesta.
+        bandwidth (float): Bytes por segundo por respuesta; None para no limitar.
+        extensions (tuple): Extensiones de los archivos enlazados.
+    """
+
+    def __init__(self, page_count=1, link_count=100, file_size=64 * 1024, latency=0.0,
+                 bandwidth=None, extensions=(".pdf", ".zip")):
+        self.page_count = page_count
+        self.link_count = link_count
+        self.file_size = file_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.extensions = extensions
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def page_urls(self):
+        return [f"{self.base_url}/page/{i}.html" for i in range(self.page_count)]
+
+    def file_names(self, page_index):
+        """Devuelve los nombres de los archivos enlazados desde una página."""
+        return [
+            f"p{page_index}_f{j}{self.extensions[j % len(self.extensions)]}"
+            for j in range(self.link_count) if j % 4 != 3
+        ]
+
+    def render_page(self, page_index):
+        """Genera el HTML de una página índice."""
+        rows = []
+        for j in range(self.link_count):
+            if j % 4 == 3:
+                href = f"/page/{page_index}/about_{j}.html"
+            else:
+                name = f"p{page_index}_f{j}{self.extensions[j % len(self.extensions)]}"
+                href = f"../files/{name}" if j % 2 else f"{self.base_url}/files/{name}"
+            rows.append(f'<tr><td><a href="{href}" class="file">Archivo {j}</a></td><td>{j} KB</td></tr>')
+        return (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Índice</title></head><body>"
+            "<h1>Listado</h1><table>" + "\n".join(rows) + "</table></body></html>"
+        ).encode("utf-8")
+
+    def _make_handler(self):
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                # Cabeceras y cuerpo se escriben por separado: sin TCP_NODELAY, Nagle y el
+                # ACK retardado añadirían ~40 ms a cada respuesta.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                if origin.latency:
+                    time.sleep(origin.latency)
+                if self.path.startswith("/page/") and self.path.count("/") == 2:
+                    try:
+                        page_index = int(self.path[len("/page/"):-len(".html")])
+                    except ValueError:
+                        page_index = -1
+                    if 0 <= page_index < origin.page_count:
+                        body = origin.render_page(page_index)
+                        self.send_response(200)
+                        self.send_header("Content-Type", "text/html; charset=utf-8")
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self._write(body)
+                        return
+                elif self.path.startswith("/files/"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(origin.file_size))
+                    self.end_headers()
+                    remaining = origin.file_size
+                    while remaining > 0:
+                        size = min(remaining, WRITE_CHUNK_SIZE, len(FILLER_BLOCK))
+                        if not self._write(FILLER_BLOCK[:size]):
+                            return
+                        remaining -= size
+                    return
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _write(self, data):
+                try:
+                    for start in range(0, len(data), WRITE_CHUNK_SIZE):
+                        chunk = data[start:start + WRITE_CHUNK_SIZE]
+                        self.wfile.write(chunk)
+                        if origin.bandwidth:
+                            time.sleep(len(chunk) / origin.bandwidth)
+                    return True
+                except (BrokenPipeError, ConnectionResetError):
+                    return False
+
+        return Handler
+
+    def start(self):
+        """Arranca el servidor en un hilo en segundo plano y devuelve su URL base."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Detiene el servidor."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
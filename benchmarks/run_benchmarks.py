@@ -0,0 +1,213 @@
+"""
+Benchmarks de extremo a extremo contra un origen HTTP sintético local.
+
+Mide get_page_content, find_download_links, download_file, organize_file y main()
+completo, e informa de páginas/s, archivos/s, MB/s y el pico de memoria residente.
+
+Uso:
+    python benchmarks/run_benchmarks.py --pages 4 --links 200 --file-size-kb 64
+    python benchmarks/run_benchmarks.py --latency-ms 20 --bandwidth-kbps 2048 --engine threads
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from bench_utils import format_table, peak_rss_mb, quiet
+from origin_server import SyntheticOrigin
+
+import main as downloader
+from http_session import create_session
+from link_parsers import PARSER_BACKENDS, resolve_parser_backend
+
+BENCHMARKS = ("get_page_content", "find_download_links", "download_file", "organize_file", "main")
+MB = 1024 * 1024
+
+
+class BenchmarkResult:
+    """Resultado de un benchmark: páginas, archivos y bytes procesados en 'seconds'."""
+
+    def __init__(self, name, seconds, pages=0, files=0, bytes_count=0):
+        self.name = name
+        self.seconds = seconds
+        self.pages = pages
+        self.files = files
+        self.bytes_count = bytes_count
+        self.peak_rss_mb = peak_rss_mb()
+
+    def row(self):
+        def rate(count):
+            return count / self.seconds if count and self.seconds > 0 else None
+
+        return [
+            self.name,
+            rate(self.pages),
+            rate(self.files),
+            rate(self.bytes_count / MB),
+            self.seconds,
+            self.peak_rss_mb,
+        ]
+
+
+def bench_get_page_content(origin, session, rounds):
+    pages = 0
+    bytes_count = 0
+    start = time.perf_counter()
+    with quiet():
+        for _ in range(rounds):
+            for url in origin.page_urls:
+                html = downloader.get_page_content(url, session)
+                pages += 1
+                bytes_count += len(html.encode("utf-8"))
+    return BenchmarkResult("get_page_content", time.perf_counter() - start, pages=pages, bytes_count=bytes_count)
+
+
+def bench_find_download_links(origin, session, rounds, parser_backend, allowed_extensions):
+    with quiet():
+        pages = [(url, downloader.get_page_content(url, session)) for url in origin.page_urls]
+    matcher = downloader.compile_extension_matcher(allowed_extensions)
+    start = time.perf_counter()
+    with quiet():
+        for _ in range(rounds):
+            for url, html in pages:
+                downloader.find_download_links(html, url, allowed_extensions, parser_backend, matcher)
+    seconds = time.perf_counter() - start
+    return BenchmarkResult(f"find_download_links ({parser_backend})", seconds, pages=rounds * len(pages))
+
+
+def bench_download_file(origin, session, work_folder, count):
+    names = [name for i in range(origin.page_count) for name in origin.file_names(i)][:count]
+    destination = os.path.join(work_folder, "download_file")
+    start = time.perf_counter()
+    with quiet():
+        downloaded = [
+            downloader.download_file(f"{origin.base_url}/files/{name}", destination, session, retries=0)
+            for name in names
+        ]
+    seconds = time.perf_counter() - start
+    files = sum(1 for path in downloaded if path)
+    return BenchmarkResult("download_file", seconds, files=files, bytes_count=files * origin.file_size)
+
+
+def bench_organize_file(work_folder, count, rule):
+    base_folder = os.path.join(work_folder, "organize_file")
+    staged = []
+    for i in range(count):
+        # Diez nombres repetidos: la mayoría de los archivos provoca una colisión.
+        staging = os.path.join(base_folder, "staging", str(i))
+        os.makedirs(staging)
+        path = os.path.join(staging, f"informe{i % 10}.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF")
+        staged.append(path)
+    start = time.perf_counter()
+    organization = downloader.compile_organization_rule(rule, base_folder)
+    with quiet():
+        organized = [
+            downloader.organize_file(path, base_folder, rule, organization=organization) for path in staged
+        ]
+    seconds = time.perf_counter() - start
+    return BenchmarkResult(f"organize_file ({rule})", seconds, files=sum(1 for path in organized if path))
+
+
+def bench_main(origin, work_folder, engine, parser_backend, allowed_extensions, rule):
+    run_folder = os.path.join(work_folder, "main")
+    os.makedirs(run_folder)
+    config = {
+        "target_urls": origin.page_urls,
+        "download_base_folder": os.path.join(run_folder, "downloads"),
+        "organization_rule": rule,
+        "allowed_extensions": allowed_extensions,
+        "rate_limits": {"default": {}},
+        "download_history_file": os.path.join(run_folder, "history.json"),
+        "page_cache_file": None,
+        "download_retries": 0,
+        "parser_backend": parser_backend,
+        "engine": engine,
+    }
+    config_path = os.path.join(run_folder, "config.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+    argv = sys.argv
+    sys.argv = ["main.py", "-c", config_path]
+    start = time.perf_counter()
+    try:
+        with quiet():
+            downloader.main()
+    finally:
+        sys.argv = argv
+    seconds = time.perf_counter() - start
+
+    files = 0
+    bytes_count = 0
+    for folder, _, file_names in os.walk(config["download_base_folder"]):
+        for file_name in file_names:
+            files += 1
+            bytes_count += os.path.getsize(os.path.join(folder, file_name))
+    return BenchmarkResult(f"main ({engine})", seconds, pages=len(origin.page_urls), files=files,
+                           bytes_count=bytes_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks contra un origen HTTP sintético local.")
+    parser.add_argument("--pages", type=int, default=4, help="Número de páginas índice.")
+    parser.add_argument("--links", type=int, default=200, help="Enlaces por página.")
+    parser.add_argument("--file-size-kb", type=int, default=64, help="Tamaño de cada archivo en KB.")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia añadida a cada respuesta.")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0,
+                        help="Ancho de banda por respuesta en KB/s (0 = sin límite).")
+    parser.add_argument("--rounds", type=int, default=5, help="Repeticiones de los benchmarks de páginas.")
+    parser.add_argument("--downloads", type=int, default=100, help="Archivos del benchmark de download_file.")
+    parser.add_argument("--organize", type=int, default=1000, help="Archivos del benchmark de organize_file.")
+    parser.add_argument("--engine", choices=["sequential", "async", "threads"], default="sequential",
+                        help="Motor usado en el benchmark de main().")
+    parser.add_argument("--parser", choices=sorted(PARSER_BACKENDS), default="html.parser",
+                        help="Backend de análisis HTML.")
+    parser.add_argument("--rule", default="type_then_date", help="Regla de organización.")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="Ejecuta solo los benchmarks indicados.")
+    args = parser.parse_args()
+
+    allowed_extensions = [".pdf", ".zip"]
+    parser_backend = resolve_parser_backend(args.parser)
+    origin = SyntheticOrigin(
+        page_count=args.pages, link_count=args.links, file_size=args.file_size_kb * 1024,
+        latency=args.latency_ms / 1000, bandwidth=args.bandwidth_kbps * 1024 or None,
+        extensions=tuple(allowed_extensions),
+    )
+    work_folder = tempfile.mkdtemp(prefix="wfd-bench-")
+    results = []
+    with origin:
+        print(f"Origen sintético en {origin.base_url}: {args.pages} páginas x {args.links} enlaces, "
+              f"archivos de {args.file_size_kb} KB.")
+        session = create_session({})
+        try:
+            if "get_page_content" in args.only:
+                results.append(bench_get_page_content(origin, session, args.rounds))
+            if "find_download_links" in args.only:
+                results.append(bench_find_download_links(origin, session, args.rounds, parser_backend,
+                                                         allowed_extensions))
+            if "download_file" in args.only:
+                results.append(bench_download_file(origin, session, work_folder, args.downloads))
+            if "organize_file" in args.only:
+                results.append(bench_organize_file(work_folder, args.organize, args.rule))
+            if "main" in args.only:
+                results.append(bench_main(origin, work_folder, args.engine, parser_backend,
+                                          allowed_extensions, args.rule))
+        finally:
+            session.close()
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    print()
+    print(format_table(
+        ["Benchmark", "Páginas/s", "Archivos/s", "MB/s", "Segundos", "RSS pico (MB)"],
+        [result.row() for result in results],
+    ))
+
+
+if __name__ == "__main__":
+    main()
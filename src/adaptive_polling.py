@@ -0,0 +1,171 @@
+import json
+import os
+import time
+
+from history_store import url_fingerprint
+
+DEFAULT_MIN_INTERVAL_SECONDS = 300
+DEFAULT_MAX_INTERVAL_SECONDS = 30 * 24 * 3600
+DEFAULT_BACKOFF_FACTOR = 2.0
+DEFAULT_SPEEDUP_FACTOR = 0.5
+
+
+def _seen_link_fingerprints(entry):
+    # Los estados anteriores guardaban las URLs completas en 'seen_links'.
+    if "seen_link_fingerprints" in entry:
+        return set(entry["seen_link_fingerprints"])
+    if "seen_links" in entry:
+        return {url_fingerprint(link) for link in entry["seen_links"]}
+    return None
+
+
+class AdaptivePollSchedule:
+    """
+    Ajusta el intervalo de consulta de cada URL objetivo según la frecuencia con la que
+    aparecen enlaces nuevos (que no estaban en la consulta anterior de la página): si una
+    consulta los encuentra, el intervalo se reduce ('speedup_factor'); si no, crece de
+    forma exponencial ('backoff_factor'). Siempre dentro de [min_interval, max_interval].
+
+    Si una consulta falla, el intervalo no cambia y la página se reintenta pronto: tras
+    min_interval, duplicándose con cada fallo seguido hasta alcanzar su intervalo.
+
+    El estado se guarda en un archivo JSON, de modo que funciona igual en modo vigilancia
+    que entre ejecuciones lanzadas por cron (las URLs que aún no tocan se saltan).
+    """
+
+    def __init__(self, state_file_path, base_intervals, min_interval=DEFAULT_MIN_INTERVAL_SECONDS,
+                 max_interval=DEFAULT_MAX_INTERVAL_SECONDS, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 speedup_factor=DEFAULT_SPEEDUP_FACTOR):
+        self.state_file_path = state_file_path
+        self.base_intervals = base_intervals
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff_factor = backoff_factor
+        self.speedup_factor = speedup_factor
+        self.state = self._load()
+
+    def _load(self):
+        if not self.state_file_path or not os.path.exists(self.state_file_path):
+            return {}
+        try:
+            with open(self.state_file_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            print(f"Estado de consultas adaptativas cargado desde: {self.state_file_path}")
+            return state
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Advertencia: No se pudo cargar el estado de consultas '{self.state_file_path}'. Se empezará de cero. Error: {e}")
+            return {}
+
+    def save(self):
+        """Guarda el estado de cada URL en el archivo JSON."""
+        if not self.state_file_path:
+            return
+        try:
+            with open(self.state_file_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=4)
+        except OSError as e:
+            print(f"Error al guardar el estado de consultas en '{self.state_file_path}': {e}")
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def interval_for(self, url):
+        """
+        Devuelve los segundos entre la última consulta de la URL y la siguiente: su
+        intervalo actual o, si la última consulta falló, el tiempo de reintento.
+        """
+        entry = self.state.get(url)
+        if not entry:
+            return self._clamp(self.base_intervals.get(url, self.min_interval))
+        interval = self._clamp(entry["interval_seconds"])
+        failures = entry.get("consecutive_failures", 0)
+        if failures:
+            return min(interval, self.min_interval * self.backoff_factor ** (failures - 1))
+        return interval
+
+    def seconds_until_due(self, url, now=None):
+        """Devuelve los segundos que faltan para la próxima consulta de la URL (0 si ya toca)."""
+        entry = self.state.get(url)
+        if not entry:
+            return 0
+        last_attempt = entry.get("failed_at") if entry.get("consecutive_failures") else entry.get("last_polled_at")
+        if not last_attempt:
+            return 0
+        now = time.time() if now is None else now
+        return max(0.0, last_attempt + self.interval_for(url) - now)
+
+    def record_poll(self, url, links, failed=False):
+        """
+        Registra el resultado de una consulta y recalcula el intervalo de la URL.
+
+        Un enlace es nuevo si no estaba en la consulta anterior de la página, así que un
+        enlace que falla siempre (un 404, por ejemplo) no impide el retroceso. La primera
+        consulta de una página solo sirve de referencia y no cambia su intervalo.
+
+        Args:
+            url (str): La URL objetivo consultada.
+            links (iterable): Enlaces de descarga encontrados en la página, o None si no
+                se analizó porque no había cambiado (304 o misma huella).
+            failed (bool): Si la página no se pudo obtener; el intervalo no cambia y la
+                última consulta válida tampoco, de modo que se reintenta pronto.
+        """
+        now = time.time()
+        entry = self.state.setdefault(url, {
+            "interval_seconds": self.interval_for(url),
+            "polls": 0,
+            "polls_with_new_links": 0,
+            "last_new_links_at": None,
+        })
+        if failed:
+            entry["failed_at"] = now
+            entry["consecutive_failures"] = entry.get("consecutive_failures", 0) + 1
+            print(f"La consulta de {url} falló. Se reintentará en {self.interval_for(url):.0f} s.")
+            return
+        entry.pop("failed_at", None)
+        entry.pop("consecutive_failures", None)
+        entry["last_polled_at"] = now
+        entry["polls"] += 1
+        previous_links = _seen_link_fingerprints(entry)
+        new_link_count = 0
+        if links is not None:
+            # Solo se guardan las huellas de 64 bits de los enlaces, no las URLs completas.
+            links = {url_fingerprint(link) for link in links}
+            entry["seen_link_fingerprints"] = sorted(links)
+            entry.pop("seen_links", None)
+            if previous_links is None:
+                return
+            new_link_count = len(links.difference(previous_links))
+        previous_interval = entry["interval_seconds"]
+        if new_link_count:
+            entry["polls_with_new_links"] += 1
+            entry["last_new_links_at"] = now
+            entry["interval_seconds"] = self._clamp(previous_interval * self.speedup_factor)
+        else:
+            entry["interval_seconds"] = self._clamp(previous_interval * self.backoff_factor)
+        if entry["interval_seconds"] != previous_interval:
+            print(f"Intervalo de consulta de {url}: {previous_interval:.0f} s -> {entry['interval_seconds']:.0f} s "
+                  f"({new_link_count} enlaces nuevos).")
+
+
+def create_poll_schedule(config, base_intervals):
+    """
+    Construye el planificador adaptativo a partir de la sección 'adaptive_polling'.
+
+    Args:
+        config (dict): La configuración completa del script.
+        base_intervals (dict): Intervalo inicial de cada URL (ver watch.resolve_poll_intervals).
+
+    Returns:
+        AdaptivePollSchedule or None: El planificador, o None si está desactivado.
+    """
+    adaptive_config = config.get("adaptive_polling") or {}
+    if not adaptive_config.get("enabled"):
+        return None
+    return AdaptivePollSchedule(
+        adaptive_config.get("state_file", "poll_state.json"),
+        base_intervals,
+        min_interval=adaptive_config.get("min_interval_seconds", DEFAULT_MIN_INTERVAL_SECONDS),
+        max_interval=adaptive_config.get("max_interval_seconds", DEFAULT_MAX_INTERVAL_SECONDS),
+        backoff_factor=adaptive_config.get("backoff_factor", DEFAULT_BACKOFF_FACTOR),
+        speedup_factor=adaptive_config.get("speedup_factor", DEFAULT_SPEEDUP_FACTOR),
+    )
@@ -0,0 +1,86 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+async def _run_pipeline(target_urls, fetch_links, download, finalize, should_download, concurrency, rate_limiter):
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    scheduled_links = set()
+    download_tasks = []
+
+    async def run_blocking(func, url):
+        # El permiso del host se espera antes de ocupar una ranura, así que un host
+        # lento de atender no frena las peticiones dirigidas a los demás.
+        if rate_limiter is not None:
+            wait_seconds = rate_limiter.reserve(url)
+            if wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+        async with slots:
+            return await loop.run_in_executor(None, func, url)
+
+    async def download_link(link):
+        # Cada URL tiene su propio '.part' y el nombre final se reserva de forma atómica,
+        # así que dos enlaces con el mismo nombre de archivo pueden descargarse a la vez.
+        download_result = await run_blocking(download, link)
+        # La organización y el historial se resuelven en el hilo del bucle de eventos,
+        # por lo que conservan exactamente la misma semántica que el modo secuencial.
+        finalize(link, download_result)
+
+    def schedule_link(link):
+        if link in scheduled_links:
+            return
+        if not should_download(link):
+            print(f"    Archivo ya descargado (o en historial): {link}. Saltando.")
+            return
+        scheduled_links.add(link)
+        download_tasks.append(asyncio.ensure_future(download_link(link)))
+
+    def consume_page(url):
+        # Se ejecuta en el pool de hilos. Si fetch_links devuelve un iterador perezoso
+        # (análisis en streaming), cada enlace se programa en cuanto aparece.
+        for link in fetch_links(url) or []:
+            loop.call_soon_threadsafe(schedule_link, link)
+
+    async def process_page(url):
+        await run_blocking(consume_page, url)
+
+    await asyncio.gather(*(process_page(url) for url in target_urls))
+    # Las tareas de descarga se crean mientras se procesan las páginas.
+    while download_tasks:
+        pending_tasks = list(download_tasks)
+        download_tasks.clear()
+        await asyncio.gather(*pending_tasks)
+
+
+def run_async_engine(target_urls, fetch_links, download, finalize, should_download,
+                     concurrency=4, rate_limiter=None):
+    """
+    Procesa las URLs objetivo de forma concurrente con asyncio: las páginas se obtienen,
+    se analizan y sus archivos se descargan al mismo tiempo, con un máximo de
+    'concurrency' peticiones en curso.
+
+    Las operaciones de red se ejecutan en un pool de hilos (usando la sesión HTTP
+    compartida), mientras que la organización de archivos y el historial se actualizan
+    únicamente desde el bucle de eventos.
+
+    Args:
+        target_urls (list): URLs de las páginas a monitorear.
+        fetch_links (callable): fetch_links(url) -> lista de enlaces o None.
+        download (callable): download(link) -> resultado de la descarga.
+        finalize (callable): finalize(link, resultado) organiza y registra el archivo.
+        should_download (callable): should_download(link) -> bool según el historial.
+        concurrency (int): Número máximo de peticiones simultáneas.
+        rate_limiter (HostRateLimiter): Limitador por host aplicado a cada petición.
+    """
+    concurrency = max(1, concurrency)
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop.set_default_executor(executor)
+    try:
+        loop.run_until_complete(_run_pipeline(
+            target_urls, fetch_links, download, finalize, should_download,
+            concurrency, rate_limiter,
+        ))
+    finally:
+        executor.shutdown(wait=True)
+        loop.close()
@@ -0,0 +1,130 @@
+import math
+import mmap
+import os
+import struct
+import threading
+
+BLOOM_MAGIC = b"WFDBLOOM"
+BLOOM_HEADER = struct.Struct("<8sQQQ")
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+MIN_BLOOM_CAPACITY = 100000
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom persistido en un archivo y proyectado en memoria con un único mmap.
+    Trabaja sobre huellas de 64 bits (ver history_store.url_fingerprint): los 'hash_count'
+    bits de cada huella se obtienen por doble hashing de sus dos mitades de 32 bits.
+
+    Formato del archivo: cabecera (magia, número de bits, número de hashes, elementos)
+    seguida del mapa de bits.
+    """
+
+    def __init__(self, path, bit_count, hash_count, item_count, file, mapping):
+        self.path = path
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.item_count = item_count
+        self._file = file
+        self._mmap = mapping
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path, capacity, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+        """
+        Crea un filtro vacío dimensionado para 'capacity' elementos.
+
+        Args:
+            path (str): Ruta del archivo del filtro.
+            capacity (int): Número de elementos previsto.
+            false_positive_rate (float): Tasa de falsos positivos deseada a plena capacidad.
+
+        Returns:
+            BloomFilter: El filtro abierto.
+        """
+        capacity = max(1, capacity)
+        bit_count = max(8, math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        bit_count = (bit_count + 7) // 8 * 8
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        with open(path, 'wb') as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bit_count, hash_count, 0))
+            f.truncate(BLOOM_HEADER.size + bit_count // 8)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Abre un filtro existente con un único mmap de lectura y escritura.
+
+        Returns:
+            BloomFilter or None: El filtro, o None si el archivo no es válido.
+        """
+        try:
+            file = open(path, 'r+b')
+        except OSError:
+            return None
+        try:
+            mapping = mmap.mmap(file.fileno(), 0)
+        except (OSError, ValueError):
+            file.close()
+            return None
+        magic, bit_count, hash_count, item_count = BLOOM_HEADER.unpack_from(mapping, 0) \
+            if len(mapping) >= BLOOM_HEADER.size else (None, 0, 0, 0)
+        if magic != BLOOM_MAGIC or len(mapping) != BLOOM_HEADER.size + bit_count // 8:
+            mapping.close()
+            file.close()
+            return None
+        return cls(path, bit_count, hash_count, item_count, file, mapping)
+
+    def _bit_positions(self, fingerprint):
+        low = fingerprint & 0xFFFFFFFF
+        high = (fingerprint >> 32) | 1
+        for i in range(self.hash_count):
+            yield (low + i * high) % self.bit_count
+
+    def might_contain(self, fingerprint):
+        """
+        Indica si la huella podría estar en el conjunto.
+
+        Returns:
+            bool: False garantiza que no está; True significa "probablemente".
+        """
+        mapping = self._mmap
+        for position in self._bit_positions(fingerprint):
+            if not mapping[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, fingerprint):
+        """Añade una huella al filtro."""
+        with self._lock:
+            mapping = self._mmap
+            for position in self._bit_positions(fingerprint):
+                index = BLOOM_HEADER.size + (position >> 3)
+                mapping[index] = mapping[index] | (1 << (position & 7))
+            self.item_count += 1
+
+    def flush(self, item_count=None):
+        """
+        Escribe la cabecera y sincroniza el mapa de bits con el disco.
+
+        Args:
+            item_count (int): Número de elementos del historial al que corresponde el filtro.
+        """
+        with self._lock:
+            if item_count is not None:
+                self.item_count = item_count
+            BLOOM_HEADER.pack_into(self._mmap, 0, BLOOM_MAGIC, self.bit_count, self.hash_count, self.item_count)
+            self._mmap.flush()
+
+    def close(self):
+        """Libera el mmap y el archivo."""
+        with self._lock:
+            self._mmap.close()
+            self._file.close()
+
+
+def bloom_path_for(history_file_path):
+    """Devuelve la ruta del filtro de Bloom asociado a un archivo de historial."""
+    base_path, extension = os.path.splitext(history_file_path)
+    return (base_path if extension else history_file_path) + ".bloom"
@@ -0,0 +1,92 @@
+import os
+import sys
+
+# ioctl FICLONE de Linux (btrfs, XFS, bcachefs...): copia por referencia sin duplicar bloques.
+FICLONE = 0x40049409
+
+
+def clone_file(source_path, target_path):
+    """
+    Crea 'target_path' como reflink de 'source_path' cuando el sistema de archivos lo admite.
+
+    Returns:
+        bool: True si se creó el reflink.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    try:
+        with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(target_path)
+        except OSError:
+            pass
+        return False
+
+
+def link_or_clone(source_path, target_path):
+    """
+    Hace que 'target_path' comparta el contenido de 'source_path' sin copiar datos:
+    primero con un enlace duro y, si no es posible (p. ej. otro sistema de archivos),
+    con un reflink.
+
+    Returns:
+        bool: True si se creó el enlace.
+    """
+    try:
+        os.link(source_path, target_path)
+        return True
+    except OSError:
+        return clone_file(source_path, target_path)
+
+
+class ContentStore:
+    """
+    Almacén direccionado por contenido: cada contenido distinto se guarda una sola vez
+    bajo su SHA-256 (objects/ab/cdef...). Los archivos organizados con el mismo contenido
+    se convierten en enlaces duros (o reflinks) al mismo objeto.
+
+    Los enlaces duros comparten los datos: modificar uno de esos archivos modifica todos.
+    """
+
+    def __init__(self, root_folder):
+        self.root_folder = root_folder
+        os.makedirs(root_folder, exist_ok=True)
+
+    def object_path(self, sha256):
+        """Devuelve la ruta del objeto correspondiente a un hash."""
+        return os.path.join(self.root_folder, sha256[:2], sha256[2:])
+
+    def deduplicate(self, file_path, sha256):
+        """
+        Registra el archivo en el almacén o, si su contenido ya estaba, lo sustituye
+        por un enlace al objeto existente.
+
+        Args:
+            file_path (str): Ruta del archivo ya organizado.
+            sha256 (str): Hash SHA-256 de su contenido, calculado durante la descarga.
+
+        Returns:
+            bool: True si el archivo era un duplicado y ahora es un enlace al objeto existente.
+        """
+        object_path = self.object_path(sha256)
+        if os.path.exists(object_path):
+            if os.path.samefile(object_path, file_path):
+                return False
+            if os.path.getsize(object_path) != os.path.getsize(file_path):
+                print(f"  Advertencia: El objeto {object_path} no coincide en tamaño con {file_path}. Se conserva la copia.")
+                return False
+            temp_path = file_path + ".link"
+            if not link_or_clone(object_path, temp_path):
+                return False
+            os.replace(temp_path, file_path)
+            return True
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        if not link_or_clone(file_path, object_path):
+            print(f"  Advertencia: No se pudo registrar {file_path} en el almacén de contenido.")
+        return False
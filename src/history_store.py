@@ -0,0 +1,560 @@
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from bloom_filter import DEFAULT_FALSE_POSITIVE_RATE, MIN_BLOOM_CAPACITY, BloomFilter, bloom_path_for
+
+DEFAULT_HISTORY_BACKEND = "json"
+DEFAULT_SQLITE_BATCH_SIZE = 50
+DEFAULT_JOURNAL_COMPACTION_THRESHOLD = 1000
+JOURNAL_SUFFIX = ".journal.jsonl"
+FINGERPRINT_SUFFIX = ".fp64"
+# Huellas por bloque al leer o escribir la tabla del historial compacto.
+TABLE_BLOCK_SIZE = 65536
+
+
+def load_download_history(history_file_path):
+    """
+    Carga el historial de URLs de archivos descargados desde un archivo JSON.
+
+    Args:
+        history_file_path (str): La ruta al archivo de historial JSON.
+
+    Returns:
+        set: Un conjunto de URLs de archivos que ya han sido descargados.
+    """
+    if os.path.exists(history_file_path):
+        try:
+            with open(history_file_path, 'r', encoding='utf-8') as f:
+                history_list = json.load(f)
+                print(f"Historial de descargas cargado desde: {history_file_path}")
+                return set(history_list)
+        except json.JSONDecodeError as e:
+            print(f"Advertencia: Archivo de historial corrupto '{history_file_path}'. Se creará uno nuevo. Error: {e}")
+            return set()
+        except Exception as e:
+            print(f"Advertencia: Error al cargar el historial de descargas '{history_file_path}'. Error: {e}")
+            return set()
+    return set()
+
+
+def save_download_history(history_file_path, downloaded_urls):
+    """
+    Guarda el conjunto de URLs de archivos descargados en un archivo JSON.
+
+    Args:
+        history_file_path (str): La ruta al archivo de historial JSON.
+        downloaded_urls (set): El conjunto de URLs de archivos descargados.
+    """
+    try:
+        with open(history_file_path, 'w', encoding='utf-8') as f:
+            json.dump(list(downloaded_urls), f, indent=4)
+        print(f"Historial de descargas guardado en: {history_file_path}")
+    except Exception as e:
+        print(f"Error al guardar el historial de descargas en '{history_file_path}': {e}")
+
+
+def url_fingerprint(url):
+    """
+    Calcula la huella de 64 bits de una URL (BLAKE2b truncado).
+
+    Args:
+        url (str): La URL.
+
+    Returns:
+        int: Un entero sin signo de 64 bits.
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class JsonHistoryStore:
+    """
+    Historial clásico: un conjunto de URLs en memoria que se vuelca completo a un
+    archivo JSON al final de la ejecución.
+    """
+
+    def __init__(self, history_file_path):
+        self.history_file_path = history_file_path
+        self.urls = load_download_history(history_file_path)
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add(self, url, **metadata):
+        """Registra una URL descargada. Este backend no conserva metadatos."""
+        self.urls.add(url)
+
+    def iter_fingerprints(self):
+        """Recorre las huellas de 64 bits de todas las URLs del historial."""
+        return (url_fingerprint(url) for url in list(self.urls))
+
+    def save(self):
+        """Vuelca el historial completo al archivo JSON."""
+        save_download_history(self.history_file_path, self.urls)
+
+    def close(self):
+        """No mantiene recursos abiertos."""
+
+
+class JournalHistoryStore:
+    """
+    Historial con diario de solo añadido: cada URL descargada se escribe como una línea
+    JSONL en cuanto se organiza el archivo, en lugar de volcar todo al final. Al cargar,
+    se lee la instantánea JSON y se reproduce el diario; cuando el diario supera
+    'compaction_threshold' entradas, se compacta en una nueva instantánea.
+    """
+
+    def __init__(self, history_file_path, compaction_threshold=DEFAULT_JOURNAL_COMPACTION_THRESHOLD):
+        self.history_file_path = history_file_path
+        self.journal_path = history_file_path + JOURNAL_SUFFIX
+        self.compaction_threshold = max(1, compaction_threshold)
+        self._lock = threading.Lock()
+        self.urls = load_download_history(history_file_path)
+        self._journal_entries = self._replay_journal()
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+        entries = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self.urls.add(json.loads(line)["url"])
+                    entries += 1
+                except (ValueError, KeyError, TypeError):
+                    # Una línea truncada por una ejecución interrumpida se ignora.
+                    continue
+        print(f"Diario de historial reproducido: {entries} entradas desde {self.journal_path}")
+        return entries
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add(self, url, **metadata):
+        """
+        Registra una URL descargada y la añade de inmediato al diario.
+
+        Args:
+            url (str): La URL de origen.
+            **metadata: Metadatos opcionales (etag, size, sha256, path) que se guardan en el diario.
+        """
+        entry = {"url": url}
+        entry.update({key: value for key, value in metadata.items() if value is not None})
+        with self._lock:
+            self.urls.add(url)
+            self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            self._journal_entries += 1
+            if self._journal_entries >= self.compaction_threshold:
+                self._compact()
+
+    def iter_fingerprints(self):
+        """Recorre las huellas de 64 bits de todas las URLs del historial."""
+        return (url_fingerprint(url) for url in list(self.urls))
+
+    def compact(self):
+        """Reescribe la instantánea con el historial completo y vacía el diario."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        # Debe llamarse con self._lock adquirido.
+        temp_path = self.history_file_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self.urls), f, indent=4)
+        os.replace(temp_path, self.history_file_path)
+        # Si el proceso muere aquí, reproducir el diario de nuevo es inofensivo.
+        self._journal.close()
+        self._journal = open(self.journal_path, 'w', encoding='utf-8')
+        self._journal_entries = 0
+        print(f"Diario de historial compactado en: {self.history_file_path}")
+
+    def save(self):
+        """Las entradas ya se escribieron en el diario a medida que se añadían."""
+        print(f"Historial de descargas guardado en: {self.journal_path}")
+
+    def close(self):
+        """Cierra el diario."""
+        with self._lock:
+            self._journal.close()
+
+
+class SqliteHistoryStore:
+    """
+    Historial en SQLite (modo WAL) con metadatos por URL: ETag, tamaño, checksum,
+    ruta final y fechas. Las búsquedas usan el índice de la clave primaria y las
+    inserciones se confirman en lotes a medida que terminan las descargas, por lo
+    que una ejecución interrumpida conserva casi todo su progreso.
+    """
+
+    def __init__(self, db_path, batch_size=DEFAULT_SQLITE_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS downloads (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                size INTEGER,
+                sha256 TEXT,
+                path TEXT,
+                first_downloaded_at TEXT NOT NULL,
+                last_downloaded_at TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+        print(f"Historial de descargas (SQLite) abierto en: {db_path}")
+
+    def import_urls(self, urls):
+        """
+        Importa URLs sin metadatos, p. ej. desde un historial JSON anterior.
+
+        Args:
+            urls (iterable): Las URLs a registrar.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO downloads (url, first_downloaded_at, last_downloaded_at) VALUES (?, ?, ?)",
+                ((url, now, now) for url in urls),
+            )
+            self._connection.commit()
+
+    def __contains__(self, url):
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM downloads WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def add(self, url, etag=None, size=None, sha256=None, path=None):
+        """
+        Registra (o actualiza) una URL descargada con sus metadatos.
+
+        Args:
+            url (str): La URL de origen.
+            etag (str): El ETag devuelto por el servidor.
+            size (int): El tamaño del archivo en bytes.
+            sha256 (str): El checksum SHA-256 del contenido.
+            path (str): La ruta final del archivo organizado.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO downloads (url, etag, size, sha256, path, first_downloaded_at, last_downloaded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    size = excluded.size,
+                    sha256 = excluded.sha256,
+                    path = excluded.path,
+                    last_downloaded_at = excluded.last_downloaded_at
+                """,
+                (url, etag, size, sha256, path, now, now),
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= self.batch_size:
+                self._connection.commit()
+                self._pending_writes = 0
+
+    def iter_fingerprints(self):
+        """Recorre las huellas de 64 bits de todas las URLs del historial."""
+        with self._lock:
+            cursor = self._connection.execute("SELECT url FROM downloads")
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                for (url,) in rows:
+                    yield url_fingerprint(url)
+
+    def save(self):
+        """Confirma el lote de inserciones pendiente."""
+        with self._lock:
+            self._connection.commit()
+            self._pending_writes = 0
+        print(f"Historial de descargas guardado en: {self.db_path}")
+
+    def close(self):
+        """Confirma lo pendiente y cierra la base de datos."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+class CompactHistoryStore:
+    """
+    Historial compacto para millones de URLs: en lugar de las cadenas completas guarda
+    huellas de 64 bits en una tabla ordenada en disco que se proyecta en memoria con
+    mmap y se consulta por búsqueda binaria. Las URLs nuevas de la ejecución se guardan
+    aparte y se fusionan con la tabla en save(), en una sola pasada lineal.
+
+    Cada entrada ocupa 8 bytes. Dos URLs distintas solo se confunden si comparten
+    huella; con 10 millones de URLs la probabilidad de que ocurra alguna vez es de
+    aproximadamente 3 entre un millón.
+    """
+
+    def __init__(self, table_path):
+        self.table_path = table_path
+        self._lock = threading.Lock()
+        self._new_fingerprints = set()
+        self._file = None
+        self._mmap = None
+        self._table = memoryview(array('Q'))
+        self._open_table()
+
+    def _open_table(self):
+        if not os.path.exists(self.table_path) or os.path.getsize(self.table_path) == 0:
+            return
+        self._file = open(self.table_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        with memoryview(self._mmap) as raw_view:
+            self._table = raw_view.cast('Q')
+        print(f"Historial compacto cargado desde: {self.table_path} ({len(self._table)} huellas)")
+
+    def _close_table(self):
+        self._table.release()
+        self._table = memoryview(array('Q'))
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+    def _table_contains(self, fingerprint):
+        index = bisect_left(self._table, fingerprint)
+        return index < len(self._table) and self._table[index] == fingerprint
+
+    def contains_fingerprint(self, fingerprint):
+        """Indica si una huella (ver url_fingerprint) está en el historial."""
+        with self._lock:
+            return fingerprint in self._new_fingerprints or self._table_contains(fingerprint)
+
+    def __contains__(self, url):
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._table) + len(self._new_fingerprints)
+
+    def add(self, url, **metadata):
+        """Registra una URL descargada. Este backend no conserva metadatos."""
+        fingerprint = url_fingerprint(url)
+        with self._lock:
+            if not self._table_contains(fingerprint):
+                self._new_fingerprints.add(fingerprint)
+
+    def iter_fingerprints(self):
+        """
+        Recorre las huellas de 64 bits de todas las URLs del historial. La tabla se lee por
+        bloques de la proyección en memoria, sin copiarla entera.
+        """
+        with self._lock:
+            new_fingerprints = list(self._new_fingerprints)
+            table = self._table
+        yield from new_fingerprints
+        offset = 0
+        block = []
+        while True:
+            with self._lock:
+                if self._table is not table:
+                    # save() sustituyó la tabla entre dos bloques: la nueva está ordenada
+                    # y contiene la anterior, así que se sigue tras la última huella leída.
+                    table = self._table
+                    offset = bisect_right(table, block[-1]) if block else 0
+                block = table[offset:offset + TABLE_BLOCK_SIZE].tolist()
+            if not block:
+                return
+            yield from block
+            offset += len(block)
+
+    def import_urls(self, urls):
+        """Importa URLs, p. ej. desde un historial JSON anterior, y guarda la tabla."""
+        for url in urls:
+            self.add(url)
+        self.save()
+
+    def save(self):
+        """Fusiona las huellas nuevas con la tabla ordenada y la reescribe de forma atómica."""
+        with self._lock:
+            if not self._new_fingerprints:
+                return
+            temp_path = self.table_path + ".tmp"
+            buffer = array('Q')
+            with open(temp_path, 'wb') as f:
+                for fingerprint in heapq.merge(self._table, sorted(self._new_fingerprints)):
+                    buffer.append(fingerprint)
+                    if len(buffer) >= TABLE_BLOCK_SIZE:
+                        buffer.tofile(f)
+                        del buffer[:]
+                buffer.tofile(f)
+            self._close_table()
+            os.replace(temp_path, self.table_path)
+            self._new_fingerprints.clear()
+            self._open_table()
+        print(f"Historial de descargas guardado en: {self.table_path}")
+
+    def close(self):
+        """Libera la proyección en memoria de la tabla."""
+        with self._lock:
+            self._close_table()
+
+
+class BloomFilteredHistory:
+    """
+    Capa de filtro de Bloom delante de un historial. Las URLs que el filtro descarta
+    con certeza (la mayoría de enlaces nuevos) no llegan a consultar el historial, lo
+    que ahorra accesos a disco con los backends 'sqlite' y 'compact'.
+    """
+
+    def __init__(self, store, bloom_filter):
+        self.store = store
+        self.bloom_filter = bloom_filter
+        self.lookups = 0
+        self.lookups_avoided = 0
+
+    def __contains__(self, url):
+        self.lookups += 1
+        if not self.bloom_filter.might_contain(url_fingerprint(url)):
+            self.lookups_avoided += 1
+            return False
+        return url in self.store
+
+    def __len__(self):
+        return len(self.store)
+
+    def add(self, url, **metadata):
+        """Registra la URL en el historial y en el filtro."""
+        self.store.add(url, **metadata)
+        self.bloom_filter.add(url_fingerprint(url))
+
+    def save(self):
+        """Guarda el historial y sincroniza el filtro con el disco."""
+        self.store.save()
+        self.bloom_filter.flush(len(self.store))
+
+    def close(self):
+        """Cierra el historial y el filtro."""
+        self.bloom_filter.flush(len(self.store))
+        if self.lookups:
+            print(f"Filtro de Bloom: {self.lookups_avoided} de {self.lookups} consultas resueltas sin acceder al historial.")
+        self.store.close()
+        self.bloom_filter.close()
+
+
+def open_bloom_filter(store, bloom_path, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+    """
+    Abre el filtro de Bloom de un historial, o lo reconstruye si no existe, no coincide
+    con el número de entradas del historial o se ha llenado por encima de su capacidad.
+
+    Args:
+        store: El historial al que acompaña el filtro.
+        bloom_path (str): Ruta del archivo del filtro.
+        false_positive_rate (float): Tasa de falsos positivos deseada.
+
+    Returns:
+        BloomFilter: El filtro sincronizado con el historial.
+    """
+    item_count = len(store)
+    bloom_filter = BloomFilter.load(bloom_path)
+    if bloom_filter is not None:
+        capacity = bloom_filter.bit_count * (math.log(2) ** 2) / -math.log(false_positive_rate)
+        if bloom_filter.item_count == item_count and item_count <= capacity:
+            print(f"Filtro de Bloom cargado desde: {bloom_path}")
+            return bloom_filter
+        bloom_filter.close()
+
+    print(f"Reconstruyendo el filtro de Bloom del historial ({item_count} entradas)...")
+    bloom_filter = BloomFilter.create(bloom_path, max(MIN_BLOOM_CAPACITY, 2 * item_count), false_positive_rate)
+    for fingerprint in store.iter_fingerprints():
+        bloom_filter.add(fingerprint)
+    bloom_filter.flush(item_count)
+    return bloom_filter
+
+
+def open_download_history(history_file_path, backend=DEFAULT_HISTORY_BACKEND, options=None):
+    """
+    Abre el historial de descargas con el backend configurado.
+
+    Con los backends 'sqlite' y 'compact', si 'history_file_path' apunta a un archivo
+    .json se usa la misma ruta con extensión .sqlite3 o .fp64, y en su primera creación
+    se importan las URLs del historial JSON existente.
+
+    Args:
+        history_file_path (str): La ruta configurada en 'download_history_file'.
+        backend (str): 'json' (por defecto), 'journal', 'sqlite' o 'compact'.
+        options (dict): Sección 'history' de la configuración (p. ej. 'batch_size',
+            'compaction_threshold' o 'bloom_filter').
+
+    Returns:
+        El historial abierto (JsonHistoryStore, JournalHistoryStore, SqliteHistoryStore
+        o CompactHistoryStore), envuelto en BloomFilteredHistory si 'bloom_filter' está activo.
+    """
+    options = options or {}
+    store = _open_history_backend(history_file_path, backend, options)
+    if options.get("bloom_filter"):
+        bloom_filter = open_bloom_filter(
+            store, bloom_path_for(history_file_path),
+            options.get("bloom_false_positive_rate", DEFAULT_FALSE_POSITIVE_RATE),
+        )
+        return BloomFilteredHistory(store, bloom_filter)
+    return store
+
+
+def _open_history_backend(history_file_path, backend, options):
+    if backend == "sqlite":
+        db_path = history_file_path
+        if db_path.endswith(".json"):
+            db_path = db_path[:-len(".json")] + ".sqlite3"
+        is_new_database = not os.path.exists(db_path)
+        store = SqliteHistoryStore(db_path, options.get("batch_size", DEFAULT_SQLITE_BATCH_SIZE))
+        if is_new_database and db_path != history_file_path and os.path.exists(history_file_path):
+            legacy_urls = load_download_history(history_file_path)
+            store.import_urls(legacy_urls)
+            print(f"Se importaron {len(legacy_urls)} URLs del historial JSON a SQLite.")
+        return store
+
+    if backend == "compact":
+        table_path = history_file_path
+        if table_path.endswith(".json"):
+            table_path = table_path[:-len(".json")] + FINGERPRINT_SUFFIX
+        is_new_table = not os.path.exists(table_path)
+        store = CompactHistoryStore(table_path)
+        if is_new_table and table_path != history_file_path and os.path.exists(history_file_path):
+            legacy_urls = load_download_history(history_file_path)
+            store.import_urls(legacy_urls)
+            print(f"Se importaron {len(legacy_urls)} URLs del historial JSON al historial compacto.")
+        return store
+
+    if backend == "journal":
+        return JournalHistoryStore(
+            history_file_path, options.get("compaction_threshold", DEFAULT_JOURNAL_COMPACTION_THRESHOLD),
+        )
+
+    if backend != "json":
+        print(f"Advertencia: Backend de historial desconocido '{backend}'. Se usará 'json'.")
+    return JsonHistoryStore(history_file_path)
@@ -0,0 +1,101 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    Adaptador HTTP que conserva las estadísticas de los pools de conexiones,
+    incluso de aquellos que el PoolManager descarta al superar 'pool_connections'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._retired_requests = 0
+        self._retired_connections = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pools.dispose_func = self._retire_pool
+
+    def _retire_pool(self, pool):
+        self._retired_requests += pool.num_requests
+        self._retired_connections += pool.num_connections
+        pool.close()
+
+    def connection_stats(self):
+        """
+        Devuelve el total de peticiones realizadas y de conexiones abiertas por este adaptador.
+
+        Returns:
+            tuple: (peticiones, conexiones_nuevas)
+        """
+        total_requests = self._retired_requests
+        total_connections = self._retired_connections
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total_requests += pool.num_requests
+                total_connections += pool.num_connections
+        return total_requests, total_connections
+
+
+def create_session(session_config=None):
+    """
+    Crea la sesión HTTP compartida de la ejecución, con keep-alive y pools de conexiones
+    configurables globalmente y por host.
+
+    Args:
+        session_config (dict): Sección 'http_session' de la configuración. Admite
+            'pool_connections', 'pool_maxsize' y 'host_pool_maxsize' ({host: tamaño}).
+
+    Returns:
+        requests.Session: La sesión lista para usar en páginas y descargas.
+    """
+    session_config = session_config or {}
+    pool_connections = session_config.get("pool_connections", DEFAULT_POOL_CONNECTIONS)
+    pool_maxsize = session_config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)
+
+    session = requests.Session()
+    session.headers["Connection"] = "keep-alive"
+
+    default_adapter = PooledHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", default_adapter)
+    session.mount("https://", default_adapter)
+
+    for host, host_pool_maxsize in session_config.get("host_pool_maxsize", {}).items():
+        host_adapter = PooledHTTPAdapter(pool_connections=1, pool_maxsize=host_pool_maxsize)
+        session.mount(f"http://{host}/", host_adapter)
+        session.mount(f"https://{host}/", host_adapter)
+
+    return session
+
+
+def get_connection_stats(session):
+    """
+    Calcula cuántas conexiones se abrieron y cuántas se reutilizaron en la sesión.
+
+    Args:
+        session (requests.Session): La sesión creada con create_session.
+
+    Returns:
+        dict: Claves 'requests', 'new_connections' y 'reused_connections'.
+    """
+    total_requests = 0
+    total_connections = 0
+    seen_adapters = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen_adapters or not isinstance(adapter, PooledHTTPAdapter):
+            continue
+        seen_adapters.add(id(adapter))
+        adapter_requests, adapter_connections = adapter.connection_stats()
+        total_requests += adapter_requests
+        total_connections += adapter_connections
+    return {
+        "requests": total_requests,
+        "new_connections": total_connections,
+        "reused_connections": max(total_requests - total_connections, 0),
+    }
@@ -0,0 +1,137 @@
+import importlib.util
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+def compile_extension_matcher(allowed_extensions):
+    """
+    Prepara una sola vez el filtro de extensiones permitidas.
+
+    Args:
+        allowed_extensions (list): Extensiones permitidas, p. ej. ['.pdf', '.zip'].
+
+    Returns:
+        callable: matcher(url) -> bool; compara, sin distinguir mayúsculas, el final
+        de la ruta de la URL (sin consulta ni fragmento) con las extensiones.
+    """
+    suffixes = tuple(ext.lower() for ext in allowed_extensions)
+
+    def matcher(url):
+        return urlsplit(url).path.lower().endswith(suffixes)
+
+    return matcher
+
+
+class AnchorHrefCollector(HTMLParser):
+    """
+    Tokenizador HTML que solo recoge el atributo href de las etiquetas <a>, sin
+    construir ningún árbol. Los href se acumulan en 'hrefs' en orden de aparición.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = None
+        for name, value in attrs:
+            # Igual que BeautifulSoup: si el atributo se repite, gana el último.
+            if name == 'href':
+                href = value if value is not None else ""
+        if href is not None:
+            self.hrefs.append(href)
+
+
+def iter_streaming_hrefs(text_chunks):
+    """
+    Analiza el HTML de forma incremental y devuelve los href de las etiquetas <a>
+    en cuanto se cierra cada etiqueta, sin esperar al resto de la página.
+
+    Args:
+        text_chunks (iterable): Fragmentos de texto de la página, en orden.
+
+    Yields:
+        str: El valor del atributo href de cada enlace.
+    """
+    collector = AnchorHrefCollector()
+    for text in text_chunks:
+        collector.feed(text)
+        if collector.hrefs:
+            yield from collector.hrefs
+            collector.hrefs.clear()
+    collector.close()
+    yield from collector.hrefs
+
+
+def _soup_hrefs(html_content, features, parse_only=None):
+    soup = BeautifulSoup(html_content, features, parse_only=parse_only)
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+
+def _html_parser_hrefs(html_content):
+    return _soup_hrefs(html_content, 'html.parser')
+
+
+def _lxml_hrefs(html_content):
+    return _soup_hrefs(html_content, 'lxml')
+
+
+def _strainer_hrefs(html_content):
+    return _soup_hrefs(html_content, 'html.parser', parse_only=SoupStrainer('a', href=True))
+
+
+def _tokenizer_hrefs(html_content):
+    collector = AnchorHrefCollector()
+    collector.feed(html_content)
+    collector.close()
+    return collector.hrefs
+
+
+PARSER_BACKENDS = {
+    "html.parser": _html_parser_hrefs,
+    "lxml": _lxml_hrefs,
+    "strainer": _strainer_hrefs,
+    "tokenizer": _tokenizer_hrefs,
+}
+DEFAULT_PARSER_BACKEND = "html.parser"
+
+
+def resolve_parser_backend(backend):
+    """
+    Valida el backend de análisis elegido y comprueba que sus dependencias estén instaladas.
+
+    Args:
+        backend (str): Nombre del backend ('html.parser', 'lxml', 'strainer' o 'tokenizer').
+
+    Returns:
+        str: El backend a usar; el predeterminado si el elegido no está disponible.
+    """
+    if backend not in PARSER_BACKENDS:
+        print(f"Advertencia: Backend de análisis desconocido '{backend}'. Se usará '{DEFAULT_PARSER_BACKEND}'.")
+        return DEFAULT_PARSER_BACKEND
+    if backend == "lxml" and importlib.util.find_spec("lxml") is None:
+        print(f"Advertencia: El backend 'lxml' requiere 'pip install lxml'. Se usará '{DEFAULT_PARSER_BACKEND}'.")
+        return DEFAULT_PARSER_BACKEND
+    return backend
+
+
+def iter_hrefs(html_content, backend=DEFAULT_PARSER_BACKEND):
+    """
+    Extrae los href de todas las etiquetas <a> con el backend indicado.
+
+    'html.parser' construye el árbol completo de BeautifulSoup; 'lxml' usa el mismo
+    árbol con el analizador en C de lxml; 'strainer' solo conserva las etiquetas <a>
+    mediante SoupStrainer; 'tokenizer' recorre los tokens sin construir ningún árbol.
+
+    Args:
+        html_content (str): El HTML de la página.
+        backend (str): El backend de análisis.
+
+    Returns:
+        list: Los valores href en orden de aparición.
+    """
+    return PARSER_BACKENDS[backend](html_content)
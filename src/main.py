@@ -1,12 +1,42 @@
 import requests
-from bs4 import BeautifulSoup
 import os
 import shutil
-from datetime import datetime
-import time
 from urllib.parse import urljoin, urlparse
 import json
 import argparse
+import time
+import threading
+import codecs
+import cProfile
+import hashlib
+
+from adaptive_polling import create_poll_schedule
+from async_engine import run_async_engine
+from content_store import ContentStore
+from history_store import DEFAULT_HISTORY_BACKEND, open_download_history
+from http_session import DEFAULT_POOL_MAXSIZE, create_session, get_connection_stats
+from name_index import DirectoryNameIndex
+from link_parsers import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, compile_extension_matcher, iter_hrefs, iter_streaming_hrefs, resolve_parser_backend
+from organization import compile_organization_rule
+from metrics import RunMetrics, count_error, load_metric_baseline
+from page_cache import (
+    build_conditional_headers, compile_volatile_patterns, extension_set_key, known_page_links, load_page_cache,
+    page_fingerprint, record_page_links, record_page_response, save_page_cache,
+)
+from profiler import PhaseProfiler
+from rate_limiter import create_rate_limiter
+from resumable import part_folder_for, part_path_for, part_path_for_url, promote_part_file, stream_to_part_file
+from segmented import (
+    DEFAULT_SEGMENT_COUNT, DEFAULT_SEGMENT_MIN_SIZE_MB, pending_segmented_download, segment_limit_for_host,
+    segmented_download_to_part,
+)
+from thread_engine import DEFAULT_HOST_CONCURRENCY, DEFAULT_MAX_WORKERS, run_thread_pool_engine
+from watch import resolve_poll_intervals, run_watch_loop, stop_on_termination_signal
+
+DEFAULT_DOWNLOAD_RETRIES = 3
+
+# Valor devuelto por get_page_content cuando el servidor responde 304 Not Modified.
+PAGE_NOT_MODIFIED = object()
 
 def load_config(config_path):
     """
@@ -36,99 +66,205 @@ def load_config(config_path):
         return None
 
 
-def load_download_history(history_file_path):
+def report_page_error(url, error, metrics=None):
     """
-    Carga el historial de URLs de archivos descargados desde un archivo JSON.
-
-    Args:
-        history_file_path (str): La ruta al archivo de historial JSON.
-
-    Returns:
-        set: Un conjunto de URLs de archivos que ya han sido descargados.
+    Informa del error al obtener una página objetivo y lo cuenta en las métricas
+    según su tipo.
     """
-    if os.path.exists(history_file_path):
-        try:
-            with open(history_file_path, 'r', encoding='utf-8') as f:
-                history_list = json.load(f)
-                print(f"Historial de descargas cargado desde: {history_file_path}")
-                return set(history_list)
-        except json.JSONDecodeError as e:
-            print(f"Advertencia: Archivo de historial corrupto '{history_file_path}'. Se creará uno nuevo. Error: {e}")
-            return set()
-        except Exception as e:
-            print(f"Advertencia: Error al cargar el historial de descargas '{history_file_path}'. Error: {e}")
-            return set()
-    return set()
+    if isinstance(error, requests.exceptions.HTTPError):
+        print(f"Error HTTP al acceder a {url}: {error}")
+        count_error(metrics, "page", "HTTPError")
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        print(f"Error de conexión al acceder a {url}: {error}")
+        count_error(metrics, "page", "ConnectionError")
+    elif isinstance(error, requests.exceptions.Timeout):
+        print(f"Tiempo de espera agotado al acceder a {url}: {error}")
+        count_error(metrics, "page", "Timeout")
+    elif isinstance(error, requests.exceptions.RequestException):
+        print(f"Error desconocido de requests al acceder a {url}: {error}")
+        count_error(metrics, "page", "RequestException")
+    else:
+        print(f"Ocurrió un error inesperado al obtener el contenido de {url}: {error}")
+        count_error(metrics, "page", "Exception")
 
 
-def save_download_history(history_file_path, downloaded_urls):
+def get_page_content(url, session=None, page_cache=None, metrics=None):
     """
-    Guarda el conjunto de URLs de archivos descargados en un archivo JSON.
-
-    Args:
-        history_file_path (str): La ruta al archivo de historial JSON.
-        downloaded_urls (set): El conjunto de URLs de archivos descargados.
+    Realiza una petición HTTP GET a la URL especificada y devuelve el contenido HTML.
+    Maneja posibles errores de red o de respuesta HTTP.
+    Si se indica una sesión, la petición reutiliza sus conexiones abiertas.
+    Si se indica una caché de páginas, la petición es condicional (ETag / Last-Modified)
+    y devuelve PAGE_NOT_MODIFIED cuando la página no ha cambiado.
+    Si se indican métricas (RunMetrics), se cuentan los bytes recibidos y los errores.
     """
+    print(f"Intentando obtener contenido de: {url}")
+    http = session or requests
+    headers = build_conditional_headers(page_cache, url) if page_cache is not None else {}
     try:
-        with open(history_file_path, 'w', encoding='utf-8') as f:
-            json.dump(list(downloaded_urls), f, indent=4)
-        print(f"Historial de descargas guardado en: {history_file_path}")
+        response = http.get(url, timeout=10, headers=headers)
+        if response.status_code == 304:
+            print(f"La página no ha cambiado desde la última consulta: {url}")
+            return PAGE_NOT_MODIFIED
+        response.raise_for_status()
+        if page_cache is not None:
+            record_page_response(page_cache, url, response)
+        if metrics is not None:
+            metrics.inc("page_bytes_total", len(response.content))
+        print(f"Contenido obtenido exitosamente de: {url}")
+        return response.text
     except Exception as e:
-        print(f"Error al guardar el historial de descargas en '{history_file_path}': {e}")
+        report_page_error(url, e, metrics)
+    return None
 
 
-def get_page_content(url):
+def get_page_content_stream(url, session=None, page_cache=None, chunk_size=65536, metrics=None):
     """
-    Realiza una petición HTTP GET a la URL especificada y devuelve el contenido HTML.
-    Maneja posibles errores de red o de respuesta HTTP.
+    Variante en streaming de get_page_content: en lugar de esperar al cuerpo completo,
+    devuelve un iterador con los fragmentos de texto de la página a medida que llegan.
+    Admite la misma caché de páginas y devuelve PAGE_NOT_MODIFIED ante un 304.
+
+    Returns:
+        iterator or None: Los fragmentos de texto, PAGE_NOT_MODIFIED, o None si hubo un error.
     """
     print(f"Intentando obtener contenido de: {url}")
+    http = session or requests
+    headers = build_conditional_headers(page_cache, url) if page_cache is not None else {}
     try:
-        response = requests.get(url, timeout=10)
+        response = http.get(url, timeout=10, headers=headers, stream=True)
+        if response.status_code == 304:
+            response.close()
+            print(f"La página no ha cambiado desde la última consulta: {url}")
+            return PAGE_NOT_MODIFIED
         response.raise_for_status()
-        print(f"Contenido obtenido exitosamente de: {url}")
-        return response.text
-    except requests.exceptions.HTTPError as e:
-        print(f"Error HTTP al acceder a {url}: {e}")
-    except requests.exceptions.ConnectionError as e:
-        print(f"Error de conexión al acceder a {url}: {e}")
-    except requests.exceptions.Timeout as e:
-        print(f"Tiempo de espera agotado al acceder a {url}: {e}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error desconocido de requests al acceder a {url}: {e}")
+        return iter_page_chunks(url, response, page_cache, chunk_size, metrics)
     except Exception as e:
-        print(f"Ocurrió un error inesperado al obtener el contenido de {url}: {e}")
+        report_page_error(url, e, metrics)
     return None
 
 
-def find_download_links(html_content, base_url, allowed_extensions):
+def iter_page_chunks(url, response, page_cache=None, chunk_size=65536, metrics=None):
+    """
+    Decodifica de forma incremental el cuerpo de una respuesta en streaming.
+    Los validadores de la página solo se guardan en la caché si la transferencia
+    termina completa; si se interrumpe, la entrada de la página se descarta y la
+    excepción llega al consumidor del iterador.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    body_hash = hashlib.sha256()
+    try:
+        with response:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                body_hash.update(chunk)
+                if metrics is not None:
+                    metrics.inc("page_bytes_total", len(chunk))
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+    except requests.exceptions.RequestException as e:
+        print(f"La transferencia de {url} se interrumpió: {e}")
+        count_error(metrics, "page", "RequestException")
+        if page_cache is not None:
+            page_cache.pop(url, None)
+        raise
+    if page_cache is not None:
+        record_page_response(page_cache, url, response, body_hash.hexdigest())
+    print(f"Contenido obtenido exitosamente de: {url}")
+
+
+def find_download_links(html_content, base_url, allowed_extensions, parser_backend=DEFAULT_PARSER_BACKEND,
+                        extension_matcher=None):
     """
     Analiza el contenido HTML para encontrar enlaces de descarga de archivos
-    basándose en las extensiones permitidas.
+    basándose en las extensiones permitidas, comparadas con la ruta de cada URL.
+    El análisis se hace con el backend indicado (ver link_parsers.PARSER_BACKENDS).
+    Si se indica 'extension_matcher' (ver compile_extension_matcher), se usa en lugar
+    de compilar de nuevo 'allowed_extensions'.
     """
     print("Buscando enlaces de descarga...")
-    soup = BeautifulSoup(html_content, 'html.parser')
-    found_links = []
+    matches_extension = extension_matcher or compile_extension_matcher(allowed_extensions)
+    # Diccionario como conjunto ordenado: búsqueda O(1) conservando el orden de aparición.
+    found_links = {}
+    seen_hrefs = set()
+
+    for href in iter_hrefs(html_content, parser_backend):
+        if href in seen_hrefs:
+            continue
+        seen_hrefs.add(href)
+        absolute_url = urljoin(base_url, href)
+
+        if absolute_url not in found_links and matches_extension(absolute_url):
+            found_links[absolute_url] = None
+            print(f"  Enlace encontrado: {absolute_url}")
+
+    if not found_links:
+        print("No se encontraron enlaces de descarga con las extensiones permitidas en esta página.")
+    return list(found_links)
+
+
+def find_download_links_streaming(text_chunks, base_url, allowed_extensions, extension_matcher=None):
+    """
+    Variante incremental de find_download_links: analiza la página a medida que llegan
+    sus fragmentos y devuelve cada enlace de descarga en cuanto se cierra su etiqueta <a>.
+    """
+    print("Buscando enlaces de descarga (modo streaming)...")
+    matches_extension = extension_matcher or compile_extension_matcher(allowed_extensions)
+    found_links = set()
+    seen_hrefs = set()
 
-    for link in soup.find_all('a', href=True):
-        href = link['href']
+    for href in iter_streaming_hrefs(text_chunks):
+        if href in seen_hrefs:
+            continue
+        seen_hrefs.add(href)
         absolute_url = urljoin(base_url, href)
 
-        if any(absolute_url.lower().endswith(ext) for ext in allowed_extensions):
-            if absolute_url not in found_links:
-                found_links.append(absolute_url)
-                print(f"  Enlace encontrado: {absolute_url}")
+        if absolute_url not in found_links and matches_extension(absolute_url):
+            found_links.add(absolute_url)
+            print(f"  Enlace encontrado: {absolute_url}")
+            yield absolute_url
 
     if not found_links:
         print("No se encontraron enlaces de descarga con las extensiones permitidas en esta página.")
-    return found_links
 
 
-def download_file(file_url, destination_folder):
+def download_file(file_url, destination_folder, session=None, retries=DEFAULT_DOWNLOAD_RETRIES,
+                  segment_count=1, segment_min_size=None, file_info=None, name_index=None,
+                  file_name=None, create_folder=True, metrics=None, part_folder=None, rate_limiter=None):
     """
     Descarga un archivo de la URL especificada a la carpeta de destino.
+    Si se indica una sesión, la descarga reutiliza sus conexiones abiertas.
+
+    Los datos se escriben en un archivo '.part' que solo se renombra al nombre final
+    cuando la descarga termina. Si la conexión se corta, la descarga se reanuda con
+    Range / If-Range hasta 'retries' veces, y el '.part' se conserva para continuar
+    en la siguiente ejecución.
+
+    Si 'segment_count' es mayor que 1, los archivos de al menos 'segment_min_size' bytes
+    cuyo servidor admite rangos se descargan en 'segment_count' partes simultáneas. Si se
+    indica 'rate_limiter', cada petición de rango espera su permiso del host.
+
+    Si se indica 'file_info' (dict), se rellena con el 'etag', el 'size' y el 'sha256'
+    del archivo descargado.
+
+    Si se indica 'name_index' (DirectoryNameIndex), un archivo existente con el mismo nombre
+    no se da por descargado: al terminar, el '.part' se renombra a la ruta libre
+    'nombre(N).ext' que reserve el índice.
+
+    'file_name' sustituye al nombre tomado de la URL. Con 'create_folder=False' se
+    asume que la carpeta de destino ya existe.
+
+    Si se indica 'part_folder', el '.part' se guarda en esa carpeta con un nombre derivado
+    de la URL (ver resumable.part_path_for_url) en lugar de junto al destino, de modo que
+    se reanuda aunque el destino cambie entre ejecuciones.
+
+    Si se indican métricas (RunMetrics), cada error capturado se cuenta por su clase.
     """
-    file_name = os.path.basename(urlparse(file_url).path)
+    file_name = file_name or os.path.basename(urlparse(file_url).path)
 
     if not file_name:
         print(f"No se pudo determinar el nombre del archivo para {file_url}. Saltando descarga.")
@@ -136,48 +272,143 @@ def download_file(file_url, destination_folder):
 
     file_path = os.path.join(destination_folder, file_name)
 
-    os.makedirs(destination_folder, exist_ok=True)
+    if create_folder:
+        os.makedirs(destination_folder, exist_ok=True)
+        if part_folder:
+            os.makedirs(part_folder, exist_ok=True)
 
-    if os.path.exists(file_path):
+    if name_index is None and os.path.exists(file_path):
         print(f"  El archivo '{file_name}' ya existe en '{destination_folder}'. Saltando descarga local.")
         return file_path
 
     print(f"  Descargando '{file_name}' de: {file_url}")
-    try:
-        with requests.get(file_url, stream=True, timeout=30) as r:
-            r.raise_for_status()
-
-            with open(file_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        print(f"  Descarga completa: '{file_path}'")
-        return file_path
+    http = session or requests
+    part_path = part_path_for_url(part_folder, file_url) if part_folder else part_path_for(file_path)
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(min(2 ** (attempt - 1), 30))
+            print(f"  Reintento {attempt}/{retries} de {file_url}")
+        try:
+            # Un plan segmentado pendiente se reanuda aunque ahora se permitan menos segmentos.
+            segment_plan = pending_segmented_download(part_path, file_url)
+            if segment_plan is None:
+                segment_plan = stream_to_part_file(
+                    http, file_url, part_path, timeout=30,
+                    segment_min_size=segment_min_size if segment_count > 1 else None,
+                    file_info=file_info,
+                )
+            if segment_plan is not None:
+                total_size, validator = segment_plan
+                segmented_download_to_part(
+                    http, file_url, part_path, total_size, validator, segment_count,
+                    timeout=30, file_info=file_info, rate_limiter=rate_limiter,
+                )
+            if name_index is not None:
+                file_path = name_index.reserve(destination_folder, file_name)
+            promote_part_file(part_path, file_path)
+            print(f"  Descarga completa: '{file_path}'")
+            return file_path
 
-    except requests.exceptions.HTTPError as e:
-        print(f"  Error HTTP al descargar {file_url}: {e}")
-    except requests.exceptions.ConnectionError as e:
-        print(f"  Error de conexión al descargar {file_url}: {e}")
-    except requests.exceptions.Timeout as e:
-        print(f"  Tiempo de espera agotado al descargar {file_url}: {e}")
-    except requests.exceptions.RequestException as e:
-        print(f"  Error desconocido de requests al descargar {file_url}: {e}")
-    except IOError as e:
-        print(f"  Error de E/S al guardar el archivo {file_path}: {e}")
-    except Exception as e:
-        print(f"  Ocurrió un error inesperado durante la descarga de {file_url}: {e}")
+        except requests.exceptions.HTTPError as e:
+            print(f"  Error HTTP al descargar {file_url}: {e}")
+            count_error(metrics, "download", "HTTPError")
+            if e.response is not None and e.response.status_code == 416:
+                # El '.part' ya se descartó; el reintento empieza de cero.
+                continue
+        except requests.exceptions.ConnectionError as e:
+            print(f"  Error de conexión al descargar {file_url}: {e}")
+            count_error(metrics, "download", "ConnectionError")
+            continue
+        except requests.exceptions.Timeout as e:
+            print(f"  Tiempo de espera agotado al descargar {file_url}: {e}")
+            count_error(metrics, "download", "Timeout")
+            continue
+        except requests.exceptions.ChunkedEncodingError as e:
+            print(f"  La conexión se interrumpió durante la descarga de {file_url}: {e}")
+            count_error(metrics, "download", "ChunkedEncodingError")
+            continue
+        except requests.exceptions.RequestException as e:
+            print(f"  Error desconocido de requests al descargar {file_url}: {e}")
+            count_error(metrics, "download", "RequestException")
+        except IOError as e:
+            print(f"  Error de E/S al guardar el archivo {file_path}: {e}")
+            count_error(metrics, "download", "IOError")
+        except Exception as e:
+            print(f"  Ocurrió un error inesperado durante la descarga de {file_url}: {e}")
+            count_error(metrics, "download", "Exception")
+        break
 
     return None
 
 
-def organize_file(file_path, base_download_folder, rule_type):
+def resolve_organized_folder(file_name, base_download_folder, rule_type, organization=None):
+    """
+    Calcula la carpeta de destino de un archivo según la regla de organización,
+    sin tocar el disco.
+
+    Args:
+        file_name (str): El nombre del archivo.
+        base_download_folder (str): La carpeta base donde se organizarán los archivos.
+        rule_type (str): La regla de organización ('date', 'type', 'type_then_date' o una
+            plantilla, ver organization.compile_organization_rule).
+        organization (OrganizationRule): La regla ya compilada. Si se indica, se usa en
+            lugar de compilar 'rule_type' en cada llamada.
+
+    Returns:
+        str or None: La carpeta de destino, o None si la regla es desconocida.
+    """
+    if organization is None:
+        try:
+            organization = compile_organization_rule(rule_type, base_download_folder)
+        except ValueError:
+            return None
+    destination = organization.destination_for(file_name, file_name)
+    return destination[0] if destination else None
+
+
+def resolve_free_file_path(destination_dir, file_name, name_index=None):
+    """
+    Devuelve una ruta libre para 'file_name' dentro de 'destination_dir', añadiendo
+    un contador 'nombre(N).ext' si ya existe un archivo con ese nombre.
+
+    Args:
+        destination_dir (str): La carpeta de destino.
+        file_name (str): El nombre deseado.
+        name_index (DirectoryNameIndex): Si se indica, el nombre se reserva en el índice
+            en tiempo constante en lugar de probar cada contador en el disco.
+
+    Returns:
+        str: La ruta libre.
+    """
+    if name_index is not None:
+        return name_index.reserve(destination_dir, file_name)
+
+    final_file_path = os.path.join(destination_dir, file_name)
+
+    counter = 1
+    original_file_name_without_ext, original_ext = os.path.splitext(file_name)
+    while os.path.exists(final_file_path):
+        new_file_name = f"{original_file_name_without_ext}({counter}){original_ext}"
+        final_file_path = os.path.join(destination_dir, new_file_name)
+        counter += 1
+    return final_file_path
+
+
+def organize_file(file_path, base_download_folder, rule_type, name_index=None, organization=None):
     """
     Organiza un archivo descargado en una subcarpeta basada en la regla definida.
-    Ahora soporta 'date', 'type', y 'type_then_date'.
+    Ahora soporta 'date', 'type', 'type_then_date' y plantillas de ruta.
+
+    Las descargas del script ya se escriben directamente en su carpeta organizada
+    (ver download_link); esta función se mantiene para mover archivos existentes.
 
     Args:
         file_path (str): La ruta actual del archivo descargado.
         base_download_folder (str): La carpeta base donde se organizarán los archivos.
         rule_type (str): La regla de organización ('date', 'type', o 'type_then_date').
+        name_index (DirectoryNameIndex): Índice opcional para resolver colisiones de nombre.
+        organization (OrganizationRule): La regla ya compilada; al organizar muchos archivos
+            evita compilar la plantilla para cada uno.
 
     Returns:
         str or None: La nueva ruta del archivo si la organización fue exitosa,
@@ -188,44 +419,13 @@ def organize_file(file_path, base_download_folder, rule_type):
         return None
 
     file_name = os.path.basename(file_path)
-    file_extension = os.path.splitext(file_name)[1].lower().replace('.', '')
-
-    subfolder_1 = ""
-    subfolder_2 = ""
-
-    if rule_type == "date":
-        today_date = datetime.now().strftime("%Y-%m-%d")
-        subfolder_1 = today_date
-    elif rule_type == "type":
-        if file_extension:
-            subfolder_1 = file_extension.capitalize()
-        else:
-            subfolder_1 = "Otros"
-    elif rule_type == "type_then_date":
-        if file_extension:
-            subfolder_1 = file_extension.capitalize()
-        else:
-            subfolder_1 = "Otros"
-        today_date = datetime.now().strftime("%Y-%m-%d")
-        subfolder_2 = today_date
-    else:
+    final_destination_dir = resolve_organized_folder(file_name, base_download_folder, rule_type, organization)
+    if final_destination_dir is None:
         print(f"  Regla de organización desconocida: '{rule_type}'. El archivo se quedará en la carpeta base.")
         return None
 
-    if subfolder_2:
-        final_destination_dir = os.path.join(base_download_folder, subfolder_1, subfolder_2)
-    else:
-        final_destination_dir = os.path.join(base_download_folder, subfolder_1)
-
     os.makedirs(final_destination_dir, exist_ok=True)
-    final_file_path = os.path.join(final_destination_dir, file_name)
-
-    counter = 1
-    original_file_name_without_ext, original_ext = os.path.splitext(file_name)
-    while os.path.exists(final_file_path):
-        new_file_name = f"{original_file_name_without_ext}({counter}){original_ext}"
-        final_file_path = os.path.join(final_destination_dir, new_file_name)
-        counter += 1
+    final_file_path = resolve_free_file_path(final_destination_dir, file_name, name_index)
 
     print(f"  Organizando '{file_name}' a: '{final_destination_dir}'")
     try:
@@ -240,6 +440,420 @@ def organize_file(file_path, base_download_folder, rule_type):
         print(f"  Ocurrió un error inesperado al organizar el archivo {file_path}: {e}")
     return None
 
+class RunContext:
+    """
+    Agrupa el estado compartido de una ejecución: la configuración efectiva,
+    la sesión HTTP, el limitador de peticiones, la caché de páginas y el historial de descargas.
+    """
+
+    def __init__(self, download_base_folder, organization_rule, allowed_extensions,
+                 rate_limiter, session, downloaded_urls_history, force_download, page_cache=None,
+                 download_retries=DEFAULT_DOWNLOAD_RETRIES, segment_count=1, segment_min_size=None,
+                 streaming_parse=False, parser_backend=DEFAULT_PARSER_BACKEND, content_store=None,
+                 organization=None, profiler=None, metrics=None, volatile_patterns=None, segment_limit=None):
+        self.download_base_folder = download_base_folder
+        self.organization_rule = organization_rule
+        # Regla compilada; si no se indica, se compila aquí (una vez por ejecución).
+        self.organization = organization or compile_organization_rule(organization_rule, download_base_folder)
+        self.allowed_extensions = allowed_extensions
+        self.extension_matcher = compile_extension_matcher(allowed_extensions)
+        self.rate_limiter = rate_limiter
+        self.session = session
+        self.downloaded_urls_history = downloaded_urls_history
+        self.force_download = force_download
+        self.page_cache = page_cache
+        # Patrones volátiles compilados para la huella de las páginas; None la desactiva.
+        self.volatile_patterns = volatile_patterns
+        self.download_retries = download_retries
+        self.segment_count = segment_count
+        self.segment_min_size = segment_min_size
+        # segment_limit(url) -> segmentos por archivo que admite el host; None no limita.
+        self.segment_limit = segment_limit
+        self.streaming_parse = streaming_parse
+        self.parser_backend = parser_backend
+        self.content_store = content_store
+        # Carpeta de parciales de cada carpeta de destino (ver resumable.part_folder_for).
+        self._part_folders = {}
+        self.profiler = profiler or PhaseProfiler(enabled=False)
+        self.metrics = metrics or RunMetrics()
+        # Nombres ocupados en cada carpeta de destino, para resolver colisiones sin sondear el disco.
+        self.name_index = DirectoryNameIndex()
+        # Página de origen de cada enlace, para invalidar su caché si la descarga falla.
+        self.link_sources = {}
+        # Enlaces encontrados en cada página analizada y páginas que no se pudieron
+        # obtener, para ajustar los intervalos de consulta adaptativos.
+        self.page_links = {}
+        self.failed_pages = set()
+        # Páginas cuyos enlaces aún se están procesando. Si la ejecución se interrumpe,
+        # su entrada de la caché se descarta para que la próxima ejecución no las dé por vistas.
+        self.pages_in_progress = set()
+
+    def should_download(self, link):
+        """Indica si el enlace debe descargarse según el historial y el modo forzado."""
+        if self.force_download or link not in self.downloaded_urls_history:
+            return True
+        self.metrics.inc("links_skipped_history_total", target=self.link_sources.get(link, ""))
+        return False
+
+    def part_folder_for(self, destination_folder):
+        """
+        Devuelve (y crea la primera vez) la carpeta de los '.part' de un destino. No depende
+        de las subcarpetas con fecha, así que una descarga interrumpida se reanuda en la
+        siguiente ejecución, y está en el sistema de archivos del destino.
+        """
+        part_folder = self._part_folders.get(destination_folder)
+        if part_folder is None:
+            part_folder = part_folder_for(destination_folder, self.download_base_folder)
+            self.organization.ensure_folder(part_folder)
+            self._part_folders[destination_folder] = part_folder
+        return part_folder
+
+    def segment_count_for(self, link):
+        """Devuelve cuántos segmentos puede usar la descarga del enlace."""
+        if self.segment_limit is None:
+            return self.segment_count
+        return min(self.segment_count, self.segment_limit(link))
+
+
+def fetch_download_links(url, context):
+    """
+    Obtiene una página objetivo y extrae sus enlaces de descarga.
+
+    Args:
+        url (str): La URL de la página a procesar.
+        context (RunContext): El estado de la ejecución.
+
+    Returns:
+        list or iterator or None: Los enlaces encontrados (un iterador perezoso en modo
+        streaming), o None si no se pudo obtener la página.
+    """
+    if context.streaming_parse:
+        return fetch_download_links_streaming(url, context)
+
+    with context.profiler.phase("page fetch", url):
+        html_content = get_page_content(url, context.session, context.page_cache, context.metrics)
+    if html_content is PAGE_NOT_MODIFIED:
+        context.metrics.inc("pages_fetched_total", target=url, result="not_modified")
+        print(f"Sin cambios en {url}. Se omite la búsqueda de enlaces.")
+        return []
+    if not html_content:
+        context.metrics.inc("pages_fetched_total", target=url, result="error")
+        context.failed_pages.add(url)
+        print(f"No se pudo obtener el contenido de {url}. Saltando esta URL.")
+        return None
+
+    # Algunos orígenes ignoran las peticiones condicionales: si la huella del contenido
+    # coincide con la anterior, la página no ha cambiado aunque la respuesta sea un 200.
+    fingerprint = None
+    if context.page_cache is not None and context.volatile_patterns is not None:
+        with context.profiler.phase("link extraction", url):
+            fingerprint = page_fingerprint(html_content, context.volatile_patterns)
+            known_links = known_page_links(context.page_cache, url, fingerprint)
+        if known_links is not None:
+            context.metrics.inc("pages_fetched_total", target=url, result="unchanged")
+            print(f"El contenido de {url} no ha cambiado desde la última consulta "
+                  f"({len(known_links)} enlaces conocidos). Se omite la búsqueda de enlaces.")
+            return []
+    context.metrics.inc("pages_fetched_total", target=url, result="ok")
+
+    with context.profiler.phase("link extraction", url):
+        download_links = find_download_links(
+            html_content, url, context.allowed_extensions, context.parser_backend, context.extension_matcher,
+        )
+    if fingerprint is not None:
+        record_page_links(context.page_cache, url, fingerprint, download_links)
+    context.pages_in_progress.add(url)
+    context.page_links[url] = set(download_links)
+    for link in download_links:
+        context.link_sources.setdefault(link, url)
+    context.metrics.inc("links_found_total", len(download_links), target=url)
+    if download_links:
+        print(f"Se encontraron {len(download_links)} enlaces descargables en {url}. Iniciando descargas...")
+    else:
+        print(f"No se encontraron archivos descargables en {url} con las extensiones permitidas.")
+    return download_links
+
+
+def fetch_download_links_streaming(url, context):
+    """
+    Igual que fetch_download_links, pero la página se analiza mientras se descarga y
+    los enlaces se devuelven uno a uno, de modo que las descargas pueden empezar
+    antes de que termine la transferencia de la página.
+
+    Con el perfilado activo, la recepción del cuerpo de la página se cuenta dentro de
+    la fase de extracción de enlaces, porque ambas ocurren a la vez.
+    """
+    with context.profiler.phase("page fetch", url):
+        text_chunks = get_page_content_stream(url, context.session, context.page_cache, metrics=context.metrics)
+    if text_chunks is PAGE_NOT_MODIFIED:
+        context.metrics.inc("pages_fetched_total", target=url, result="not_modified")
+        print(f"Sin cambios en {url}. Se omite la búsqueda de enlaces.")
+        return []
+    if text_chunks is None:
+        context.metrics.inc("pages_fetched_total", target=url, result="error")
+        context.failed_pages.add(url)
+        print(f"No se pudo obtener el contenido de {url}. Saltando esta URL.")
+        return None
+    context.pages_in_progress.add(url)
+    context.page_links[url] = set()
+    download_links = find_download_links_streaming(
+        text_chunks, url, context.allowed_extensions, context.extension_matcher,
+    )
+    return iter_tracked_links(context.profiler.iter_phase(download_links, "link extraction", url), url, context)
+
+
+def iter_tracked_links(download_links, url, context):
+    """
+    Registra la página de origen de cada enlace a medida que se va encontrando.
+    La página solo cuenta como obtenida cuando su transferencia termina; si se
+    interrumpe, se marca como fallida, igual que si no se hubiera podido obtener.
+    """
+    try:
+        for link in download_links:
+            context.link_sources.setdefault(link, url)
+            context.page_links[url].add(link)
+            context.metrics.inc("links_found_total", target=url)
+            yield link
+    except requests.exceptions.RequestException:
+        context.metrics.inc("pages_fetched_total", target=url, result="error")
+        context.failed_pages.add(url)
+        print(f"No se pudo obtener el contenido completo de {url}. Los enlaces restantes se buscarán en la próxima consulta.")
+        return
+    context.metrics.inc("pages_fetched_total", target=url, result="ok")
+
+
+def invalidate_link_source(link, context):
+    """
+    Elimina de la caché la página de la que procede un enlace cuya descarga falló,
+    para que la próxima ejecución la vuelva a procesar aunque no haya cambiado.
+    """
+    source_url = context.link_sources.get(link)
+    if context.page_cache is not None and source_url:
+        context.page_cache.pop(source_url, None)
+
+
+def finalize_download(link, download_result, context):
+    """
+    Registra en el historial un archivo recién descargado en su carpeta organizada,
+    junto con sus metadatos (ETag, tamaño, checksum y ruta final).
+
+    Args:
+        link (str): La URL de origen del archivo.
+        download_result (tuple): La tupla (ruta, file_info) devuelta por download_link.
+        context (RunContext): El estado de la ejecución.
+
+    Returns:
+        str or None: La ruta final del archivo organizado, o None si falló algún paso.
+    """
+    organized_path, file_info = download_result
+    if not organized_path:
+        print(f"    No se pudo descargar el archivo de: {link}.")
+        invalidate_link_source(link, context)
+        return None
+
+    print(f"    Archivo organizado en: {organized_path}")
+    with context.profiler.phase("organize", context.link_sources.get(link)):
+        if context.content_store is not None and file_info.get("sha256"):
+            try:
+                if context.content_store.deduplicate(organized_path, file_info["sha256"]):
+                    print(f"    Contenido duplicado: '{organized_path}' ahora es un enlace al contenido ya almacenado.")
+            except OSError as e:
+                print(f"    Advertencia: No se pudo deduplicar '{organized_path}': {e}")
+                context.metrics.inc("organize_failures_total")
+        context.downloaded_urls_history.add(
+            link, etag=file_info.get("etag"), size=file_info.get("size"),
+            sha256=file_info.get("sha256"), path=organized_path,
+        )
+    return organized_path
+
+
+def download_link(link, context):
+    """
+    Descarga un enlace directamente en su carpeta organizada: el '.part' se guarda en
+    la carpeta de parciales del destino (mismo sistema de archivos, ver
+    RunContext.part_folder_for) y se renombra atómicamente al terminar, sin copiar el archivo.
+
+    Args:
+        link (str): La URL del archivo.
+        context (RunContext): El estado de la ejecución.
+
+    Returns:
+        tuple: (ruta final del archivo o None si falló, dict con 'etag', 'size' y 'sha256').
+    """
+    file_info = {}
+    source_url = context.link_sources.get(link)
+    with context.profiler.phase("organize", source_url):
+        destination = context.organization.destination_for(link)
+        if destination is not None:
+            context.organization.ensure_folder(destination[0])
+            part_folder = context.part_folder_for(destination[0])
+    if destination is None:
+        print(f"No se pudo determinar el nombre del archivo para {link}. Saltando descarga.")
+        context.metrics.inc("organize_failures_total")
+        return None, file_info
+    destination_folder, file_name = destination
+    started = time.perf_counter()
+    with context.profiler.phase("download", source_url):
+        downloaded_file_path = download_file(
+            link, destination_folder, context.session, context.download_retries,
+            context.segment_count_for(link), context.segment_min_size, file_info,
+            name_index=context.name_index, file_name=file_name, create_folder=False,
+            metrics=context.metrics, part_folder=part_folder, rate_limiter=context.rate_limiter,
+        )
+    if downloaded_file_path:
+        context.metrics.observe_download(time.perf_counter() - started)
+        context.metrics.inc("files_downloaded_total")
+        context.metrics.inc("downloaded_bytes_total", file_info.get("size") or 0)
+    return downloaded_file_path, file_info
+
+
+def process_target_url(url, context):
+    """
+    Procesa secuencialmente una URL objetivo: obtiene la página, busca enlaces
+    y descarga y organiza cada archivo nuevo.
+
+    Args:
+        url (str): La URL de la página a procesar.
+        context (RunContext): El estado de la ejecución.
+    """
+    context.rate_limiter.acquire(url)
+    download_links = fetch_download_links(url, context)
+    for link in download_links or []:
+        if not context.should_download(link):
+            print(f"    Archivo ya descargado (o en historial): {link}. Saltando.")
+            continue
+
+        context.rate_limiter.acquire(link)
+        download_result = download_link(link, context)
+        finalize_download(link, download_result, context)
+    context.pages_in_progress.discard(url)
+
+
+def run_engine(target_urls, context, engine_options):
+    """
+    Procesa una tanda de URLs objetivo con el motor de descarga configurado.
+
+    Args:
+        target_urls (list): Las URLs a procesar.
+        context (RunContext): El estado de la ejecución.
+        engine_options (dict): 'engine', 'concurrency', 'max_workers' y 'thread_pool'.
+    """
+    engine = engine_options["engine"]
+    if engine == "async":
+        print(f"Motor asíncrono activado con {engine_options['concurrency']} peticiones simultáneas.")
+        run_async_engine(
+            target_urls,
+            fetch_links=lambda url: fetch_download_links(url, context),
+            download=lambda link: download_link(link, context),
+            finalize=lambda link, download_result: finalize_download(link, download_result, context),
+            should_download=context.should_download,
+            concurrency=engine_options["concurrency"],
+            rate_limiter=context.rate_limiter,
+        )
+    elif engine == "threads":
+        thread_pool_config = engine_options["thread_pool"]
+        print(f"Pool de hilos activado con {engine_options['max_workers']} trabajadores.")
+        run_thread_pool_engine(
+            target_urls,
+            fetch_links=lambda url: fetch_download_links(url, context),
+            download=lambda link: download_link(link, context),
+            finalize=lambda link, download_result: finalize_download(link, download_result, context),
+            should_download=context.should_download,
+            max_workers=engine_options["max_workers"],
+            host_concurrency=thread_pool_config.get("host_concurrency"),
+            default_host_concurrency=thread_pool_config.get("default_host_concurrency", DEFAULT_HOST_CONCURRENCY),
+            rate_limiter=context.rate_limiter,
+        )
+    else:
+        for url in target_urls:
+            print(f"\n--- Procesando URL: {url} ---")
+            process_target_url(url, context)
+    # Los motores solo vuelven cuando todos los enlaces de la tanda están finalizados.
+    context.pages_in_progress.difference_update(target_urls)
+
+
+def create_segment_limit(session_config, engine_options):
+    """
+    Construye el límite de segmentos por archivo de cada host, para que las descargas
+    segmentadas que el motor puede tener en curso a la vez contra un host no superen
+    el pool de conexiones de ese host.
+
+    Args:
+        session_config (dict): La sección 'http_session' efectiva (ver create_session).
+        engine_options (dict): Las opciones del motor (ver run_engine).
+
+    Returns:
+        callable: segment_limit(url) -> número máximo de segmentos por archivo.
+    """
+    engine = engine_options["engine"]
+    thread_pool_config = engine_options["thread_pool"]
+    host_pool_maxsize = session_config.get("host_pool_maxsize", {})
+    pool_maxsize = session_config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)
+
+    def segment_limit(url):
+        host = urlparse(url).hostname or ""
+        if engine == "async":
+            simultaneous_downloads = engine_options["concurrency"]
+        elif engine == "threads":
+            host_concurrency = (thread_pool_config.get("host_concurrency") or {}).get(
+                host, thread_pool_config.get("default_host_concurrency", DEFAULT_HOST_CONCURRENCY),
+            )
+            simultaneous_downloads = min(engine_options["max_workers"], host_concurrency)
+        else:
+            simultaneous_downloads = 1
+        return segment_limit_for_host(host_pool_maxsize.get(host, pool_maxsize), simultaneous_downloads)
+
+    return segment_limit
+
+
+def record_poll_results(target_urls, context, poll_schedule):
+    """
+    Pasa al planificador adaptativo el resultado de cada URL consultada (enlaces
+    encontrados, página sin cambios o fallo) y guarda su estado.
+
+    Args:
+        target_urls (list): Las URLs consultadas en la tanda.
+        context (RunContext): El estado de la ejecución.
+        poll_schedule (AdaptivePollSchedule): El planificador adaptativo.
+    """
+    for url in target_urls:
+        poll_schedule.record_poll(url, context.page_links.pop(url, None), url in context.failed_pages)
+        context.failed_pages.discard(url)
+    poll_schedule.save()
+
+
+def save_run_state(context, saved_history_count, page_cache_file, metrics_file):
+    """
+    Persiste el estado acumulado: el historial (solo si creció), la caché de páginas
+    y las métricas. Las páginas que quedaron a medio procesar (ejecución interrumpida)
+    se eliminan de la caché antes de guardarla, para que la próxima ejecución las
+    vuelva a obtener y descargue los enlaces que faltaron.
+
+    Args:
+        context (RunContext): El estado de la ejecución.
+        saved_history_count (int): Número de entradas del historial ya guardadas.
+        page_cache_file (str): Ruta de la caché de páginas, o None.
+        metrics_file (str): Ruta del archivo de métricas, o None.
+
+    Returns:
+        int: El número de entradas del historial guardadas tras la llamada.
+    """
+    history = context.downloaded_urls_history
+    with context.profiler.phase("history save"):
+        if len(history) > saved_history_count:
+            print(f"\nSe han añadido {len(history) - saved_history_count} nuevos archivos al historial.")
+            history.save()
+    if context.page_cache is not None:
+        for url in context.pages_in_progress:
+            print(f"La página {url} no se terminó de procesar. Se volverá a consultar en la próxima ejecución.")
+            context.page_cache.pop(url, None)
+        context.pages_in_progress.clear()
+        save_page_cache(page_cache_file, context.page_cache, extension_set_key(context.allowed_extensions))
+    if metrics_file:
+        context.metrics.write_textfile(metrics_file)
+    return len(history)
+
+
 def main():
     """
     Función principal que orquesta el proceso de descarga y organización.
@@ -261,9 +875,86 @@ def main():
         help="""Fuerza la descarga de archivos incluso si ya están en el historial.
         Útil para re-descargar o actualizar."""
     )
+    parser.add_argument(
+        "--engine",
+        choices=["sequential", "async", "threads"],
+        default=None,
+        help="""Motor de descarga: 'sequential' (por defecto), 'async' o 'threads'.
+        Sobrescribe la opción 'engine' del archivo de configuración."""
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="""Número máximo de peticiones simultáneas del motor 'async'.
+        Ejemplo: python src/main.py --engine async --concurrency 8"""
+    )
+    parser.add_argument(
+        "--stream-parse",
+        action="store_true",
+        help="""Analiza las páginas mientras se descargan y empieza a descargar
+        archivos en cuanto aparece cada enlace."""
+    )
+    parser.add_argument(
+        "--parser",
+        choices=sorted(PARSER_BACKENDS),
+        default=None,
+        help="""Backend de análisis HTML para extraer enlaces: 'html.parser' (por defecto),
+        'lxml', 'strainer' (solo etiquetas <a>) o 'tokenizer' (sin árbol, el más rápido).
+        Sobrescribe la opción 'parser_backend' del archivo de configuración."""
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="""Mide el tiempo de reloj y de CPU de cada fase (configuración, historial,
+        páginas, extracción de enlaces, descargas, organización) por URL objetivo
+        y muestra una tabla resumen al terminar."""
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        default=None,
+        help="""Guarda además un perfil de cProfile en este archivo (implica --profile).
+        Ejemplo: python src/main.py --profile-output perfil.pstats"""
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="""Modo vigilancia: en lugar de terminar tras una pasada, consulta cada URL
+        objetivo periódicamente según la sección 'watch' de la configuración,
+        conservando la sesión HTTP, la configuración y el historial en memoria."""
+    )
     args = parser.parse_args()
 
-    config = load_config(args.config)
+    profiler = PhaseProfiler(enabled=args.profile or bool(args.profile_output))
+    cpu_profile = None
+    if args.profile_output:
+        cpu_profile = cProfile.Profile()
+        cpu_profile.enable()
+    try:
+        run_automation(args, profiler)
+    finally:
+        if cpu_profile is not None:
+            cpu_profile.disable()
+            cpu_profile.dump_stats(args.profile_output)
+            print(f"Perfil de cProfile guardado en: '{args.profile_output}' "
+                  f"(consúltalo con: python -m pstats {args.profile_output})")
+        if profiler.enabled:
+            print("\nPerfil por fases:")
+            print(profiler.report())
+
+
+def run_automation(args, profiler):
+    """
+    Ejecuta una pasada completa con los argumentos de línea de comandos ya analizados
+    o, con --watch, vigila las URLs objetivo hasta que se detenga el proceso.
+
+    Args:
+        args (argparse.Namespace): Los argumentos de main().
+        profiler (PhaseProfiler): El perfilador de fases (desactivado si no se pidió --profile).
+    """
+    with profiler.phase("config load"):
+        config = load_config(args.config)
     if not config:
         print("No se pudo cargar la configuración. Asegúrate de que el archivo existe y es un JSON válido. Saliendo.")
         return
@@ -272,8 +963,16 @@ def main():
     DOWNLOAD_BASE_FOLDER = config.get("download_base_folder", "downloads")
     ORGANIZATION_RULE = config.get("organization_rule", "date")
     ALLOWED_EXTENSIONS = config.get("allowed_extensions", [])
-    REQUEST_DELAY_SECONDS = config.get("request_delay_seconds", 2)
     DOWNLOAD_HISTORY_FILE = config.get("download_history_file", "downloaded_files_history.json")
+    SEGMENTED_CONFIG = config.get("segmented_download", {})
+    CONTENT_STORE_CONFIG = config.get("content_store", {})
+    PAGE_CACHE_FILE = config.get("page_cache_file", "page_cache.json")
+    FINGERPRINT_CONFIG = config.get("page_fingerprint", {})
+    METRICS_FILE = config.get("metrics_file")
+    ENGINE = args.engine or config.get("engine", "sequential")
+    CONCURRENCY = args.concurrency or config.get("concurrency", 4)
+    THREAD_POOL_CONFIG = config.get("thread_pool", {})
+    MAX_WORKERS = THREAD_POOL_CONFIG.get("max_workers", DEFAULT_MAX_WORKERS)
 
     if not TARGET_URLS:
         print("Advertencia: No se han especificado URLs para monitorear en el archivo de configuración.")
@@ -289,10 +988,28 @@ def main():
     print("Iniciando el proceso de automatización de descarga de archivos web.")
     print("="*50 + "\n")
 
+    try:
+        organization = compile_organization_rule(ORGANIZATION_RULE, DOWNLOAD_BASE_FOLDER)
+    except ValueError as e:
+        print(f"Error: {e} Saliendo.")
+        return
+
     os.makedirs(DOWNLOAD_BASE_FOLDER, exist_ok=True)
     print(f"Carpeta de descargas base: '{DOWNLOAD_BASE_FOLDER}'")
+    print(f"Regla de organización: '{organization.template}'")
 
-    downloaded_urls_history = load_download_history(DOWNLOAD_HISTORY_FILE)
+    session_config = dict(config.get("http_session") or {})
+    # Cada petición simultánea necesita su propia conexión en el pool del host.
+    if ENGINE == "async":
+        session_config["pool_maxsize"] = max(session_config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE), CONCURRENCY)
+    elif ENGINE == "threads":
+        session_config["pool_maxsize"] = max(session_config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE), MAX_WORKERS)
+    session = create_session(session_config)
+
+    with profiler.phase("history load"):
+        downloaded_urls_history = open_download_history(
+            DOWNLOAD_HISTORY_FILE, config.get("history_backend", DEFAULT_HISTORY_BACKEND), config.get("history"),
+        )
     initial_downloaded_count = len(downloaded_urls_history)
     print(f"Se encontraron {initial_downloaded_count} archivos en el historial de descargas.")
     if args.force_download:
@@ -301,44 +1018,108 @@ def main():
         print("Modo normal: Los archivos ya en el historial serán saltados.")
 
 
-    for url in TARGET_URLS:
-        print(f"\n--- Procesando URL: {url} ---")
-        html_content = get_page_content(url)
-        if html_content:
-            download_links = find_download_links(html_content, url, ALLOWED_EXTENSIONS)
-            if download_links:
-                print(f"Se encontraron {len(download_links)} enlaces descargables en {url}. Iniciando descargas...")
-                for link in download_links:
-                    if link in downloaded_urls_history and not args.force_download:
-                        print(f"    Archivo ya descargado (o en historial): {link}. Saltando.")
-                        continue
-
-                    downloaded_file_path = download_file(link, DOWNLOAD_BASE_FOLDER)
-                    if downloaded_file_path:
-                        print(f"    Archivo listo para organizar: {downloaded_file_path}")
-                        organized_path = organize_file(downloaded_file_path, DOWNLOAD_BASE_FOLDER, ORGANIZATION_RULE)
-                        if organized_path:
-                            print(f"    Archivo organizado en: {organized_path}")
-                            downloaded_urls_history.add(link)
-                        else:
-                            print(f"    No se pudo organizar el archivo: {downloaded_file_path}")
-                    else:
-                        print(f"    No se pudo descargar el archivo de: {link}. Saltando organización.")
-                    time.sleep(REQUEST_DELAY_SECONDS)
-            else:
-                print(f"No se encontraron archivos descargables en {url} con las extensiones permitidas.")
+    page_cache = None
+    if PAGE_CACHE_FILE:
+        # En modo forzado no se envían peticiones condicionales, pero los validadores se renuevan.
+        page_cache = {} if args.force_download else load_page_cache(PAGE_CACHE_FILE, extension_set_key(ALLOWED_EXTENSIONS))
 
-        else:
-            print(f"No se pudo obtener el contenido de {url}. Saltando esta URL.")
+    content_store = None
+    if CONTENT_STORE_CONFIG.get("enabled"):
+        content_store = ContentStore(
+            CONTENT_STORE_CONFIG.get("folder") or os.path.join(DOWNLOAD_BASE_FOLDER, ".objects")
+        )
+        print(f"Almacén de contenido activado en: '{content_store.root_folder}'")
 
-        time.sleep(REQUEST_DELAY_SECONDS)
+    engine_options = {
+        "engine": ENGINE,
+        "concurrency": CONCURRENCY,
+        "max_workers": MAX_WORKERS,
+        "thread_pool": THREAD_POOL_CONFIG,
+    }
+    context = RunContext(
+        download_base_folder=DOWNLOAD_BASE_FOLDER,
+        organization_rule=ORGANIZATION_RULE,
+        allowed_extensions=ALLOWED_EXTENSIONS,
+        rate_limiter=create_rate_limiter(config),
+        session=session,
+        downloaded_urls_history=downloaded_urls_history,
+        force_download=args.force_download,
+        page_cache=page_cache,
+        download_retries=config.get("download_retries", DEFAULT_DOWNLOAD_RETRIES),
+        segment_count=SEGMENTED_CONFIG.get("segments", DEFAULT_SEGMENT_COUNT),
+        segment_min_size=int(SEGMENTED_CONFIG.get("min_size_mb", DEFAULT_SEGMENT_MIN_SIZE_MB) * 1024 * 1024),
+        streaming_parse=args.stream_parse or config.get("streaming_parse", False),
+        parser_backend=resolve_parser_backend(args.parser or config.get("parser_backend", DEFAULT_PARSER_BACKEND)),
+        content_store=content_store,
+        organization=organization,
+        profiler=profiler,
+        metrics=RunMetrics(load_metric_baseline(METRICS_FILE)) if METRICS_FILE else None,
+        volatile_patterns=compile_volatile_patterns(FINGERPRINT_CONFIG.get("volatile_patterns"))
+        if FINGERPRINT_CONFIG.get("enabled", True) else None,
+        segment_limit=create_segment_limit(session_config, engine_options),
+    )
 
-    if len(downloaded_urls_history) > initial_downloaded_count:
-        print(f"\nSe han añadido {len(downloaded_urls_history) - initial_downloaded_count} nuevos archivos al historial.")
-        save_download_history(DOWNLOAD_HISTORY_FILE, downloaded_urls_history)
-    else:
+    poll_intervals = resolve_poll_intervals(TARGET_URLS, config.get("watch", {}))
+    poll_schedule = create_poll_schedule(config, poll_intervals)
+    if poll_schedule is not None:
+        print(f"Consultas adaptativas activadas (intervalos entre {poll_schedule.min_interval} s "
+              f"y {poll_schedule.max_interval} s).")
+    saved_history_count = initial_downloaded_count
+    try:
+        if args.watch:
+            print(f"Modo vigilancia activado para {len(TARGET_URLS)} URLs. Ctrl+C o SIGTERM para detenerlo.")
+            stop_event = threading.Event()
+            stop_on_termination_signal(stop_event)
+
+            def poll_urls(urls):
+                nonlocal saved_history_count
+                # Cada tanda es una ejecución: la fecha de la regla de organización se renueva.
+                context.organization = compile_organization_rule(ORGANIZATION_RULE, DOWNLOAD_BASE_FOLDER)
+                run_engine(urls, context, engine_options)
+                if poll_schedule is not None:
+                    record_poll_results(urls, context, poll_schedule)
+                saved_history_count = save_run_state(
+                    context, saved_history_count, PAGE_CACHE_FILE, METRICS_FILE,
+                )
+
+            try:
+                if poll_schedule is not None:
+                    run_watch_loop(
+                        TARGET_URLS, poll_urls, poll_schedule.interval_for, stop_event,
+                        None if args.force_download else poll_schedule.seconds_until_due,
+                    )
+                else:
+                    run_watch_loop(TARGET_URLS, poll_urls, poll_intervals.get, stop_event)
+            except KeyboardInterrupt:
+                print("\nVigilancia interrumpida por el usuario.")
+        else:
+            due_urls = TARGET_URLS
+            if poll_schedule is not None and not args.force_download:
+                due_urls = []
+                for url in TARGET_URLS:
+                    wait = poll_schedule.seconds_until_due(url)
+                    if wait > 0:
+                        print(f"Consulta de {url} pospuesta: faltan {wait:.0f} s para su próximo turno.")
+                    else:
+                        due_urls.append(url)
+            run_engine(due_urls, context, engine_options)
+            if poll_schedule is not None:
+                record_poll_results(due_urls, context, poll_schedule)
+    finally:
+        save_run_state(context, saved_history_count, PAGE_CACHE_FILE, METRICS_FILE)
+        # Algunos historiales (sqlite, compact) no se pueden consultar tras close().
+        new_history_count = len(downloaded_urls_history) - initial_downloaded_count
+        connection_stats = get_connection_stats(session)
+        downloaded_urls_history.close()
+        session.close()
+
+    if not new_history_count:
         print("\nNo se descargaron nuevos archivos para añadir al historial en esta ejecución.")
 
+    print(f"Conexiones HTTP: {connection_stats['requests']} peticiones, "
+          f"{connection_stats['new_connections']} conexiones nuevas, "
+          f"{connection_stats['reused_connections']} reutilizadas.")
+
     print("\n" + "="*50)
     print("Proceso de automatización finalizado.")
     print("="*50 + "\n")
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+METRIC_PREFIX = "web_file_downloader_"
+DOWNLOAD_DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Familias exportadas: nombre -> (tipo, ayuda).
+METRIC_FAMILIES = {
+    "pages_fetched_total": ("counter", "Páginas objetivo consultadas, por URL y resultado (ok, not_modified, unchanged, error)."),
+    "page_bytes_total": ("counter", "Bytes de HTML recibidos de las páginas objetivo."),
+    "links_found_total": ("counter", "Enlaces de descarga encontrados, por URL objetivo."),
+    "links_skipped_history_total": ("counter", "Enlaces saltados por estar ya en el historial, por URL objetivo."),
+    "files_downloaded_total": ("counter", "Archivos descargados completos."),
+    "downloaded_bytes_total": ("counter", "Bytes de los archivos descargados completos."),
+    "download_duration_seconds": ("histogram", "Duración de cada descarga de archivo, incluidos los reintentos."),
+    "errors_total": ("counter", "Errores por fase ('page' o 'download') y clase de excepción capturada."),
+    "organize_failures_total": ("counter", "Archivos que no se pudieron organizar o deduplicar."),
+    "last_run_timestamp_seconds": ("gauge", "Momento (epoch) en que terminó la última ejecución."),
+    "last_run_duration_seconds": ("gauge", "Duración de la última ejecución."),
+}
+# Contadores sin etiquetas: se exportan aunque valgan cero.
+UNLABELED_COUNTERS = ("page_bytes_total", "files_downloaded_total", "downloaded_bytes_total", "organize_failures_total")
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(family, labels=()):
+    name = METRIC_PREFIX + family
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels) + "}"
+
+
+def _family_of(series_name):
+    name = series_name.split("{", 1)[0]
+    if not name.startswith(METRIC_PREFIX):
+        return None
+    family = name[len(METRIC_PREFIX):]
+    for suffix in ("_bucket", "_sum", "_count"):
+        if family.endswith(suffix) and METRIC_FAMILIES.get(family[:-len(suffix)], ("",))[0] == "histogram":
+            return family[:-len(suffix)]
+    return family if family in METRIC_FAMILIES else None
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def load_metric_baseline(metrics_file_path):
+    """
+    Lee los contadores e histogramas de un archivo de métricas anterior, para que los
+    contadores sigan creciendo entre ejecuciones de cron en lugar de reiniciarse.
+
+    Returns:
+        dict: Serie (nombre con etiquetas) -> valor. Vacío si el archivo no existe.
+    """
+    baseline = {}
+    try:
+        with open(metrics_file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                series, _, value = line.rpartition(" ")
+                family = _family_of(series)
+                if family is None or METRIC_FAMILIES[family][0] == "gauge":
+                    continue
+                try:
+                    baseline[series] = float(value)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Advertencia: No se pudo leer el archivo de métricas {metrics_file_path}: {e}")
+    return baseline
+
+
+class RunMetrics:
+    """
+    Métricas de la ejecución en formato de texto de Prometheus, pensadas para el
+    recolector 'textfile' de node_exporter. Es segura entre hilos.
+
+    Los contadores parten de 'baseline' (ver load_metric_baseline), de modo que el
+    archivo exportado es acumulativo entre ejecuciones.
+    """
+
+    def __init__(self, baseline=None):
+        self._baseline = baseline or {}
+        self._counters = {}
+        self._bucket_counts = [0] * len(DOWNLOAD_DURATION_BUCKETS)
+        self._duration_sum = 0.0
+        self._duration_count = 0
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+
+    def inc(self, family, amount=1, **labels):
+        """Incrementa el contador 'family' con las etiquetas indicadas."""
+        key = (family, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe_download(self, seconds):
+        """Registra la duración de una descarga en el histograma."""
+        with self._lock:
+            for i, bound in enumerate(DOWNLOAD_DURATION_BUCKETS):
+                if seconds <= bound:
+                    self._bucket_counts[i] += 1
+            self._duration_sum += seconds
+            self._duration_count += 1
+
+    def _samples(self):
+        with self._lock:
+            for (family, labels), value in self._counters.items():
+                yield family, _series(family, labels), value
+            for bound, count in zip(DOWNLOAD_DURATION_BUCKETS, self._bucket_counts):
+                yield "download_duration_seconds", _series("download_duration_seconds_bucket", (("le", str(bound)),)), count
+            yield ("download_duration_seconds",
+                   _series("download_duration_seconds_bucket", (("le", "+Inf"),)), self._duration_count)
+            yield "download_duration_seconds", _series("download_duration_seconds_sum"), self._duration_sum
+            yield "download_duration_seconds", _series("download_duration_seconds_count"), self._duration_count
+
+    def render(self):
+        """
+        Genera el contenido del archivo de métricas.
+
+        Returns:
+            str: Las métricas en formato de texto de Prometheus.
+        """
+        families = {family: {} for family in METRIC_FAMILIES}
+        for family, series, value in self._samples():
+            families[family][series] = value + self._baseline.get(series, 0)
+        for series, value in self._baseline.items():
+            family = _family_of(series)
+            families[family].setdefault(series, value)
+        for family in UNLABELED_COUNTERS:
+            families[family].setdefault(_series(family), 0)
+        now = time.time()
+        families["last_run_timestamp_seconds"][_series("last_run_timestamp_seconds")] = now
+        families["last_run_duration_seconds"][_series("last_run_duration_seconds")] = now - self._started_at
+
+        lines = []
+        for family, samples in families.items():
+            if not samples:
+                continue
+            metric_type, help_text = METRIC_FAMILIES[family]
+            lines.append(f"# HELP {METRIC_PREFIX}{family} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{family} {metric_type}")
+            for series, value in samples.items():
+                lines.append(f"{series} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, metrics_file_path):
+        """
+        Escribe las métricas de forma atómica (archivo temporal y os.replace), para que
+        node_exporter nunca lea un archivo a medio escribir.
+        """
+        temp_path = metrics_file_path + ".tmp"
+        try:
+            folder = os.path.dirname(metrics_file_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(temp_path, metrics_file_path)
+            print(f"Métricas guardadas en: {metrics_file_path}")
+        except OSError as e:
+            print(f"Error al guardar las métricas en {metrics_file_path}: {e}")
+
+
+def count_error(metrics, stage, exception_class):
+    """Cuenta un error capturado si hay métricas activas."""
+    if metrics is not None:
+        metrics.inc("errors_total", stage=stage, exception=exception_class)
@@ -0,0 +1,69 @@
+import os
+import re
+import threading
+
+# 'informe(3)' -> ('informe', 3)
+NUMBERED_STEM = re.compile(r"(.*)\((\d+)\)")
+
+
+class DirectoryNameIndex:
+    """
+    Índice en memoria de los nombres usados en cada carpeta de destino, para resolver
+    colisiones 'nombre(N).ext' en tiempo constante en lugar de probar N = 1, 2, 3...
+    con os.path.exists.
+
+    Cada carpeta se lee una sola vez con os.scandir. Para cada par (raíz, extensión) se
+    guarda el siguiente contador libre. Los nombres se reservan bajo un cerrojo, así que
+    varios hilos pueden pedir nombres a la vez sin recibir el mismo.
+    """
+
+    def __init__(self):
+        self._directories = {}
+        self._lock = threading.Lock()
+
+    def _scan(self, directory):
+        taken = set()
+        next_counters = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    taken.add(entry.name)
+                    stem, ext = os.path.splitext(entry.name)
+                    match = NUMBERED_STEM.fullmatch(stem)
+                    if match:
+                        key = (match.group(1), ext)
+                        next_counters[key] = max(next_counters.get(key, 1), int(match.group(2)) + 1)
+        except FileNotFoundError:
+            pass
+        return taken, next_counters
+
+    def reserve(self, directory, file_name):
+        """
+        Reserva una ruta libre para 'file_name' dentro de 'directory'.
+
+        Args:
+            directory (str): La carpeta de destino.
+            file_name (str): El nombre deseado.
+
+        Returns:
+            str: 'directory/file_name' o, si ya está en uso, 'directory/nombre(N).ext'
+            con el siguiente contador libre.
+        """
+        with self._lock:
+            state = self._directories.get(directory)
+            if state is None:
+                state = self._directories[directory] = self._scan(directory)
+            taken, next_counters = state
+
+            stem, ext = os.path.splitext(file_name)
+            key = (stem, ext)
+            candidate = file_name
+            # Normalmente basta una comprobación; el bucle solo avanza si otro proceso
+            # creó archivos en la carpeta después de leerla.
+            while candidate in taken or os.path.exists(os.path.join(directory, candidate)):
+                taken.add(candidate)
+                counter = next_counters.get(key, 1)
+                next_counters[key] = counter + 1
+                candidate = f"{stem}({counter}){ext}"
+            taken.add(candidate)
+            return os.path.join(directory, candidate)
@@ -0,0 +1,148 @@
+import os
+import threading
+from datetime import datetime
+from string import Formatter
+from urllib.parse import urlsplit
+
+# Las reglas clásicas expresadas como plantillas.
+BUILTIN_RULES = {
+    "date": "{date:%Y-%m-%d}/{name}",
+    "type": "{type}/{name}",
+    "type_then_date": "{type}/{date:%Y-%m-%d}/{name}",
+}
+TEMPLATE_FIELDS = ("host", "name", "stem", "ext", "type", "date")
+
+
+def _escape_literal(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _host_folder_name(parts):
+    # Solo el host y el puerto: las credenciales de 'usuario:clave@host' no van a la ruta.
+    host = parts.hostname or "sin_host"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port:
+        host = f"{host}:{port}"
+    return host.replace(":", "_")
+
+
+class OrganizationRule:
+    """
+    Regla de organización compilada: traduce la URL de un archivo a su carpeta y nombre
+    de destino con una plantilla como '{host}/{ext}/{date:%Y/%m}/{name}'.
+
+    Los campos '{date:...}' se resuelven una sola vez al compilar, con la fecha de la
+    ejecución, de modo que por archivo solo queda un str.format_map. Las carpetas ya
+    creadas se recuerdan para no repetir os.makedirs.
+    """
+
+    def __init__(self, template, base_download_folder, format_string, fields):
+        self.template = template
+        self.base_download_folder = base_download_folder
+        self._format_string = format_string
+        self._uses_host = "host" in fields
+        self._created_folders = set()
+        self._lock = threading.Lock()
+
+    def destination_for(self, file_url, file_name=None):
+        """
+        Calcula el destino de un archivo.
+
+        Args:
+            file_url (str): La URL del archivo.
+            file_name (str): El nombre del archivo; por defecto, el último segmento de la URL.
+
+        Returns:
+            tuple or None: (carpeta de destino, nombre del archivo), o None si la URL no
+            tiene nombre de archivo.
+        """
+        parts = urlsplit(file_url)
+        if file_name is None:
+            file_name = os.path.basename(parts.path)
+        if not file_name:
+            return None
+        stem, extension = os.path.splitext(file_name)
+        ext = extension.lower().replace('.', '')
+        values = {
+            "name": file_name,
+            "stem": stem,
+            "ext": ext or "otros",
+            "type": ext.capitalize() or "Otros",
+        }
+        if self._uses_host:
+            values["host"] = _host_folder_name(parts)
+        relative_path = self._format_string.format_map(values)
+        segments = [segment for segment in relative_path.split("/") if segment]
+        return os.path.join(self.base_download_folder, *segments[:-1]), segments[-1]
+
+    def ensure_folder(self, folder):
+        """Crea la carpeta de destino la primera vez que se usa en la ejecución."""
+        if folder in self._created_folders:
+            return
+        with self._lock:
+            if folder not in self._created_folders:
+                os.makedirs(folder, exist_ok=True)
+                self._created_folders.add(folder)
+
+
+def compile_organization_rule(rule, base_download_folder, run_date=None):
+    """
+    Compila una regla de organización una sola vez por ejecución.
+
+    Args:
+        rule (str): 'date', 'type', 'type_then_date' o una plantilla con los campos
+            {host}, {name}, {stem}, {ext}, {type} y {date:formato strftime}. Si la plantilla
+            no incluye {name} ni {stem}, se añade '/{name}' al final; si los incluye, el
+            último segmento debe contener {name}, o {stem} y {ext}.
+        base_download_folder (str): La carpeta base de las descargas.
+        run_date (datetime): Fecha usada en los campos {date}; por defecto, ahora.
+
+    Returns:
+        OrganizationRule: La regla compilada.
+
+    Raises:
+        ValueError: Si la regla es desconocida o la plantilla no es válida.
+    """
+    template = BUILTIN_RULES.get(rule, rule)
+    if not isinstance(template, str) or "{" not in template:
+        raise ValueError(f"Regla de organización desconocida: '{rule}'.")
+    run_date = run_date or datetime.now()
+
+    pieces = []
+    fields = set()
+    # Campos del último segmento de la ruta, que forma el nombre del archivo.
+    file_name_fields = set()
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError as e:
+        raise ValueError(f"Plantilla de organización no válida '{template}': {e}")
+    for literal, field, spec, conversion in parsed:
+        pieces.append(_escape_literal(literal))
+        if "/" in literal:
+            file_name_fields.clear()
+        if field is None:
+            continue
+        if field not in TEMPLATE_FIELDS:
+            raise ValueError(f"Campo desconocido '{{{field}}}' en la plantilla de organización '{template}'.")
+        fields.add(field)
+        if field == "date":
+            date_text = run_date.strftime(spec or "%Y-%m-%d")
+            pieces.append(_escape_literal(date_text))
+            if "/" in date_text:
+                file_name_fields.clear()
+        else:
+            pieces.append("{" + field + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+        file_name_fields.add(field)
+    if not fields & {"name", "stem"}:
+        pieces.append("/{name}")
+        fields.add("name")
+        file_name_fields = {"name"}
+    if "name" not in file_name_fields and not {"stem", "ext"} <= file_name_fields:
+        raise ValueError(
+            f"Plantilla de organización no válida '{template}': el último segmento debe incluir "
+            "{name}, o {stem} y {ext}, para que cada archivo conserve su nombre."
+        )
+    return OrganizationRule(template, base_download_folder, "".join(pieces), fields)
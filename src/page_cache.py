@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+
+def extension_set_key(allowed_extensions):
+    """
+    Devuelve una huella corta de la lista de extensiones permitidas (sin distinguir
+    mayúsculas ni orden), para saber con qué filtro se analizó cada página en caché.
+    """
+    normalized = sorted({ext.lower() for ext in allowed_extensions})
+    return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()[:16]
+
+
+def load_page_cache(cache_file_path, extensions_key=None):
+    """
+    Carga la caché de validadores HTTP (ETag, Last-Modified y hash del cuerpo)
+    de las páginas objetivo.
+
+    Args:
+        cache_file_path (str): La ruta al archivo de caché JSON.
+        extensions_key (str): Si se indica (ver extension_set_key), se descartan las
+            entradas guardadas con otras extensiones permitidas: esas páginas se piden sin
+            cabeceras condicionales y sin atajo de huella, para buscar los nuevos tipos.
+
+    Returns:
+        dict: Un diccionario {url: entrada} con los validadores de cada página.
+    """
+    if os.path.exists(cache_file_path):
+        try:
+            with open(cache_file_path, 'r', encoding='utf-8') as f:
+                page_cache = json.load(f)
+                print(f"Caché de páginas cargada desde: {cache_file_path}")
+            if extensions_key is not None:
+                stale_urls = [url for url, entry in page_cache.items() if entry.get("extensions") != extensions_key]
+                for url in stale_urls:
+                    del page_cache[url]
+                if stale_urls:
+                    print(f"Las extensiones permitidas cambiaron: {len(stale_urls)} páginas se analizarán de nuevo.")
+            return page_cache
+        except json.JSONDecodeError as e:
+            print(f"Advertencia: Archivo de caché de páginas corrupto '{cache_file_path}'. Se creará uno nuevo. Error: {e}")
+            return {}
+        except Exception as e:
+            print(f"Advertencia: Error al cargar la caché de páginas '{cache_file_path}'. Error: {e}")
+            return {}
+    return {}
+
+
+def save_page_cache(cache_file_path, page_cache, extensions_key=None):
+    """
+    Guarda la caché de validadores HTTP de las páginas objetivo en un archivo JSON.
+
+    Args:
+        cache_file_path (str): La ruta al archivo de caché JSON.
+        page_cache (dict): El diccionario {url: entrada} a guardar.
+        extensions_key (str): Huella de las extensiones permitidas de la ejecución, que
+            se anota en cada entrada (ver load_page_cache).
+    """
+    if extensions_key is not None:
+        for entry in page_cache.values():
+            entry["extensions"] = extensions_key
+    try:
+        with open(cache_file_path, 'w', encoding='utf-8') as f:
+            json.dump(page_cache, f, indent=4)
+        print(f"Caché de páginas guardada en: {cache_file_path}")
+    except Exception as e:
+        print(f"Error al guardar la caché de páginas en '{cache_file_path}': {e}")
+
+
+def build_conditional_headers(page_cache, url):
+    """
+    Construye las cabeceras If-None-Match / If-Modified-Since para una página ya visitada.
+
+    Args:
+        page_cache (dict): La caché de validadores.
+        url (str): La URL de la página.
+
+    Returns:
+        dict: Las cabeceras condicionales (vacío si la página no está en caché).
+    """
+    entry = page_cache.get(url) or {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def record_page_response(page_cache, url, response, body_sha256=None):
+    """
+    Actualiza la entrada de una página con los validadores de una respuesta 200.
+
+    Args:
+        page_cache (dict): La caché de validadores.
+        url (str): La URL de la página.
+        response (requests.Response): La respuesta de la página.
+        body_sha256 (str): Hash del cuerpo ya calculado (respuestas en streaming).
+            Si no se indica, se calcula a partir de response.content.
+    """
+    entry = page_cache.setdefault(url, {})
+    entry["etag"] = response.headers.get("ETag")
+    entry["last_modified"] = response.headers.get("Last-Modified")
+    entry["sha256"] = body_sha256 or hashlib.sha256(response.content).hexdigest()
+    entry["fetched_at"] = datetime.now().isoformat(timespec="seconds")
+
+
+WHITESPACE_RUN = re.compile(r"\s+")
+
+
+def compile_volatile_patterns(patterns):
+    """
+    Compila las expresiones regulares de las regiones volátiles de las páginas
+    (marcas de tiempo, tokens CSRF...), que no deben influir en su huella.
+
+    Args:
+        patterns (list): Expresiones regulares; '.' también coincide con saltos de línea.
+
+    Returns:
+        list: Los patrones compilados. Los no válidos se descartan con un aviso.
+    """
+    compiled = []
+    for pattern in patterns or []:
+        try:
+            compiled.append(re.compile(pattern, re.DOTALL))
+        except re.error as e:
+            print(f"Advertencia: Patrón volátil no válido '{pattern}': {e}. Se ignorará.")
+    return compiled
+
+
+def page_fingerprint(html_content, volatile_patterns=()):
+    """
+    Calcula la huella del contenido de una página: SHA-256 del cuerpo sin las regiones
+    volátiles y con los espacios en blanco normalizados.
+
+    Args:
+        html_content (str): El HTML de la página.
+        volatile_patterns (list): Patrones compilados a eliminar antes de calcular el hash.
+
+    Returns:
+        str: La huella en hexadecimal.
+    """
+    for pattern in volatile_patterns:
+        html_content = pattern.sub("", html_content)
+    normalized = WHITESPACE_RUN.sub(" ", html_content).strip()
+    return hashlib.sha256(normalized.encode("utf-8", errors="replace")).hexdigest()
+
+
+def known_page_links(page_cache, url, fingerprint):
+    """
+    Devuelve los enlaces guardados de una página si su huella coincide con la anterior.
+
+    Returns:
+        list or None: Los enlaces de la consulta anterior, o None si la página cambió
+        o no se conoce.
+    """
+    entry = page_cache.get(url) or {}
+    if entry.get("fingerprint") == fingerprint and "links" in entry:
+        return entry["links"]
+    return None
+
+
+def record_page_links(page_cache, url, fingerprint, links):
+    """Guarda la huella de una página y los enlaces de descarga extraídos de ella."""
+    entry = page_cache.setdefault(url, {})
+    entry["fingerprint"] = fingerprint
+    entry["links"] = list(links)
@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+
+GLOBAL_TARGET = "(global)"
+PHASE_ORDER = (
+    "config load", "history load", "page fetch", "link extraction", "download", "organize", "history save",
+)
+
+
+class PhaseProfiler:
+    """
+    Acumula el tiempo de reloj y el tiempo de CPU de cada fase de la ejecución,
+    desglosado por URL objetivo.
+
+    El tiempo de CPU es el del hilo que ejecuta la fase (time.thread_time), así que
+    sigue siendo correcto con los motores 'async' y 'threads'. Con esos motores las
+    fases se solapan: la suma de tiempos de reloj puede superar la duración real.
+
+    Desactivado, phase() no mide nada.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._started_wall = time.perf_counter()
+        self._started_cpu = time.process_time()
+
+    def record(self, phase, target, wall_seconds, cpu_seconds):
+        """Suma una medida a la fase 'phase' de la URL objetivo 'target'."""
+        key = (target or GLOBAL_TARGET, phase)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += wall_seconds
+            stats[2] += cpu_seconds
+
+    @contextmanager
+    def phase(self, phase, target=None):
+        """
+        Mide el bloque como una ejecución de la fase indicada.
+
+        Args:
+            phase (str): Nombre de la fase (ver PHASE_ORDER).
+            target (str): URL objetivo a la que se atribuye; None para fases globales.
+        """
+        if not self.enabled:
+            yield
+            return
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(phase, target, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def iter_phase(self, iterable, phase, target=None):
+        """
+        Recorre un iterador perezoso atribuyendo a la fase el tiempo de cada next().
+        El tiempo que el consumidor pasa entre elementos no se cuenta.
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(phase, target, time.perf_counter() - wall, time.thread_time() - cpu)
+                return
+            self.record(phase, target, time.perf_counter() - wall, time.thread_time() - cpu)
+            yield item
+
+    def report(self):
+        """
+        Devuelve la tabla resumen: una fila por URL objetivo y fase, y los totales por fase.
+
+        Returns:
+            str: La tabla.
+        """
+        with self._lock:
+            stats = {key: list(value) for key, value in self._stats.items()}
+        phase_rank = {phase: i for i, phase in enumerate(PHASE_ORDER)}
+        targets = []
+        for target, _ in stats:
+            if target not in targets:
+                targets.append(target)
+        if GLOBAL_TARGET in targets:
+            targets.remove(GLOBAL_TARGET)
+            targets.insert(0, GLOBAL_TARGET)
+
+        rows = []
+        totals = {}
+        for target in targets:
+            phases = sorted((phase for t, phase in stats if t == target), key=lambda p: phase_rank.get(p, len(phase_rank)))
+            for phase in phases:
+                count, wall, cpu = stats[(target, phase)]
+                rows.append((target, phase, count, wall, cpu))
+                total = totals.setdefault(phase, [0, 0.0, 0.0])
+                total[0] += count
+                total[1] += wall
+                total[2] += cpu
+        for phase in sorted(totals, key=lambda p: phase_rank.get(p, len(phase_rank))):
+            count, wall, cpu = totals[phase]
+            rows.append(("TOTAL", phase, count, wall, cpu))
+
+        headers = ("URL objetivo", "Fase", "Veces", "Reloj (s)", "CPU (s)")
+        cells = [(target, phase, str(count), f"{wall:.3f}", f"{cpu:.3f}") for target, phase, count, wall, cpu in rows]
+        widths = [max([len(header)] + [len(row[i]) for row in cells]) for i, header in enumerate(headers)]
+        lines = [
+            "  ".join(header.ljust(width) for header, width in zip(headers, widths)),
+            "  ".join("-" * width for width in widths),
+        ]
+        for row in cells:
+            lines.append("  ".join(
+                value.ljust(width) if i < 2 else value.rjust(width)
+                for i, (value, width) in enumerate(zip(row, widths))
+            ))
+        lines.append(
+            f"Duración total: {time.perf_counter() - self._started_wall:.3f} s de reloj, "
+            f"{time.process_time() - self._started_cpu:.3f} s de CPU del proceso."
+        )
+        return "\n".join(lines)
@@ -0,0 +1,104 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Cubeta de fichas clásica: se rellena a 'rate' fichas por segundo hasta un máximo
+    de 'burst'. Las reservas pueden dejar el saldo en negativo, de modo que cada
+    llamada recibe su turno en orden de llegada.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Reserva una ficha.
+
+        Returns:
+            float: Segundos que hay que esperar antes de usar la ficha reservada.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class HostRateLimiter:
+    """
+    Limitador de peticiones con una cubeta de fichas independiente por host.
+    Esperar el permiso de un host nunca retrasa las peticiones dirigidas a otros hosts.
+    """
+
+    def __init__(self, default_rate=None, default_burst=1, host_limits=None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.host_limits = host_limits or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket_for(self, url):
+        host = urlparse(url).hostname or ""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                host_limit = self.host_limits.get(host, {})
+                bucket = TokenBucket(
+                    host_limit.get("rate", self.default_rate),
+                    host_limit.get("burst", self.default_burst),
+                )
+                self._buckets[host] = bucket
+            return bucket
+
+    def reserve(self, url):
+        """
+        Reserva un permiso para el host de 'url' sin bloquear.
+
+        Returns:
+            float: Segundos que hay que esperar antes de enviar la petición.
+        """
+        return self._bucket_for(url).reserve()
+
+    def acquire(self, url):
+        """Bloquea el hilo actual hasta que haya un permiso para el host de 'url'."""
+        wait_seconds = self.reserve(url)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+
+def create_rate_limiter(config):
+    """
+    Construye el limitador a partir de la sección 'rate_limits' de la configuración.
+    Si no existe, se deriva uno equivalente de 'request_delay_seconds' (una petición
+    cada N segundos por host).
+
+    Args:
+        config (dict): La configuración completa del script.
+
+    Returns:
+        HostRateLimiter: El limitador de la ejecución.
+    """
+    rate_limits = config.get("rate_limits")
+    if rate_limits is None:
+        request_delay_seconds = config.get("request_delay_seconds", 2)
+        default_rate = 1.0 / request_delay_seconds if request_delay_seconds else None
+        return HostRateLimiter(default_rate=default_rate, default_burst=1)
+
+    default_limit = rate_limits.get("default", {})
+    return HostRateLimiter(
+        default_rate=default_limit.get("rate"),
+        default_burst=default_limit.get("burst", 1),
+        host_limits=rate_limits.get("hosts", {}),
+    )
@@ -0,0 +1,210 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+
+import requests
+
+PART_SUFFIX = ".part"
+PART_METADATA_SUFFIX = ".json"
+# Carpeta con los '.part' de las descargas del script (ver part_folder_for).
+PART_FOLDER_NAME = ".partial"
+
+
+def part_path_for(file_path):
+    """Devuelve la ruta del archivo parcial (.part) asociado a un archivo final."""
+    return file_path + PART_SUFFIX
+
+
+def part_path_for_url(part_folder, file_url):
+    """
+    Devuelve la ruta del archivo parcial de una URL dentro de 'part_folder'.
+
+    La ruta solo depende de la URL, no de la carpeta de destino: una descarga interrumpida
+    se reanuda aunque la regla de organización la lleve a otra carpeta en la siguiente
+    ejecución (por ejemplo, porque cambió la fecha).
+    """
+    url_hash = hashlib.sha256(file_url.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(part_folder, url_hash + PART_SUFFIX)
+
+
+def part_folder_for(destination_folder, base_folder):
+    """
+    Devuelve la carpeta de parciales de una carpeta de destino: '.partial' dentro de la
+    carpeta más alta, entre la carpeta base y el destino, que está en el mismo sistema de
+    archivos que el destino (normalmente, la propia carpeta base).
+
+    Así el '.part' se renombra al destino sin copiar datos aunque una subcarpeta esté
+    montada en otro disco, y la carpeta de parciales no cambia cuando cambian las
+    subcarpetas con fecha de la regla de organización.
+
+    Args:
+        destination_folder (str): La carpeta de destino; debe existir.
+        base_folder (str): La carpeta base de las descargas.
+
+    Returns:
+        str: La carpeta de parciales (sin crear).
+    """
+    root = os.path.abspath(destination_folder)
+    base = os.path.abspath(base_folder)
+    if os.path.commonpath([root, base]) != base:
+        return os.path.join(root, PART_FOLDER_NAME)
+    device = os.stat(root).st_dev
+    while root != base:
+        parent = os.path.dirname(root)
+        if os.stat(parent).st_dev != device:
+            break
+        root = parent
+    return os.path.join(root, PART_FOLDER_NAME)
+
+
+def promote_part_file(part_path, file_path):
+    """
+    Renombra un '.part' terminado a su ruta final y descarta sus metadatos. Con la carpeta
+    de part_folder_for el renombrado es atómico y sin copia; si aun así el destino está en
+    otro sistema de archivos, el archivo se copia con shutil.move.
+    """
+    try:
+        os.replace(part_path, file_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(part_path, file_path)
+    discard_part_file(part_path)
+
+
+def load_part_metadata(part_path):
+    """Lee los metadatos (URL, validador, segmentos) de un archivo parcial, o {} si no hay."""
+    try:
+        with open(part_path + PART_METADATA_SUFFIX, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_part_metadata(part_path, metadata):
+    """Guarda los metadatos de un archivo parcial junto a él."""
+    with open(part_path + PART_METADATA_SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+
+
+def update_hash_from_file(file_hash, path, chunk_size=1024 * 1024):
+    """Añade al hash el contenido de un archivo ya escrito en disco."""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash
+
+
+def discard_part_file(part_path):
+    """Elimina un archivo parcial y sus metadatos, si existen."""
+    for path in (part_path, part_path + PART_METADATA_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def response_validator(response):
+    """Devuelve el validador (ETag fuerte o Last-Modified) usable en If-Range, o None."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def supports_segmented_download(response, min_size):
+    """
+    Indica si una respuesta 200 anuncia un archivo apto para descarga segmentada:
+    admite rangos, tiene un validador para If-Range y supera 'min_size' bytes.
+
+    Returns:
+        tuple or None: (tamaño_total, validador) si es apto, o None.
+    """
+    if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+        return None
+    validator = response_validator(response)
+    try:
+        total_size = int(response.headers.get("Content-Length", ""))
+    except ValueError:
+        return None
+    if not validator or total_size < min_size:
+        return None
+    return total_size, validator
+
+
+def stream_to_part_file(http, file_url, part_path, timeout=30, chunk_size=8192, segment_min_size=None,
+                        file_info=None):
+    """
+    Descarga 'file_url' en un archivo parcial, reanudándolo con Range / If-Range
+    cuando ya existe un .part de un intento anterior de la misma URL.
+
+    Si el servidor no admite rangos o el recurso cambió desde el intento anterior,
+    responde 200 y la descarga empieza de cero. El archivo parcial solo contiene
+    bytes confirmados; el llamador debe renombrarlo cuando la función termina sin error.
+
+    Args:
+        http: La sesión (o el módulo requests) con la que hacer la petición.
+        file_url (str): La URL del archivo.
+        part_path (str): La ruta del archivo parcial.
+        timeout (int): Tiempo de espera de la petición en segundos.
+        chunk_size (int): Tamaño de los bloques leídos de la respuesta.
+        segment_min_size (int): Si se indica, los archivos nuevos de al menos este tamaño
+            que admitan rangos no se descargan aquí, sino que se delegan al llamador.
+        file_info (dict): Si se indica, se rellena con 'etag', 'size' y 'sha256' del
+            archivo completo. El hash se calcula mientras llegan los datos.
+
+    Returns:
+        tuple or None: (tamaño_total, validador) si el archivo debe descargarse por
+        segmentos; None si se descargó completo en el archivo parcial.
+    """
+    metadata = load_part_metadata(part_path)
+    resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {}
+    if (resume_from and metadata.get("url") == file_url and metadata.get("validator")
+            and "segments" not in metadata):
+        headers["Range"] = f"bytes={resume_from}-"
+        headers["If-Range"] = metadata["validator"]
+        print(f"  Reanudando descarga desde el byte {resume_from}: {file_url}")
+    elif resume_from:
+        discard_part_file(part_path)
+        resume_from = 0
+
+    with http.get(file_url, stream=True, timeout=timeout, headers=headers) as r:
+        if r.status_code == 416:
+            # El .part no encaja con el recurso actual; el siguiente intento empieza de cero.
+            discard_part_file(part_path)
+        r.raise_for_status()
+
+        if r.status_code == 206:
+            if not r.headers.get("Content-Range", "").startswith(f"bytes {resume_from}-"):
+                discard_part_file(part_path)
+                raise requests.exceptions.RequestException(
+                    f"Content-Range inesperado al reanudar: {r.headers.get('Content-Range')}"
+                )
+            mode = 'ab'
+        else:
+            if segment_min_size is not None:
+                segment_plan = supports_segmented_download(r, segment_min_size)
+                if segment_plan:
+                    return segment_plan
+            mode = 'wb'
+            save_part_metadata(part_path, {"url": file_url, "validator": response_validator(r)})
+
+        body_hash = hashlib.sha256()
+        if mode == 'ab' and file_info is not None:
+            update_hash_from_file(body_hash, part_path)
+        with open(part_path, mode) as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                body_hash.update(chunk)
+            size = f.tell()
+
+        if file_info is not None:
+            file_info["etag"] = r.headers.get("ETag") or metadata.get("validator")
+            file_info["size"] = size
+            file_info["sha256"] = body_hash.hexdigest()
+    return None
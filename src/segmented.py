@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from resumable import discard_part_file, load_part_metadata, save_part_metadata, update_hash_from_file
+
+DEFAULT_SEGMENT_COUNT = 4
+DEFAULT_SEGMENT_MIN_SIZE_MB = 50
+
+
+def segment_limit_for_host(pool_maxsize, simultaneous_downloads):
+    """
+    Calcula cuántos segmentos puede usar cada archivo de un host sin que las descargas
+    simultáneas a ese host superen su pool de conexiones.
+
+    Args:
+        pool_maxsize (int): Conexiones del pool de la sesión HTTP para el host.
+        simultaneous_downloads (int): Descargas que el motor puede tener en curso a la vez
+            contra el host.
+
+    Returns:
+        int: El número máximo de segmentos por archivo (al menos 1).
+    """
+    return max(1, pool_maxsize // max(1, simultaneous_downloads))
+
+
+def pending_segmented_download(part_path, file_url):
+    """
+    Devuelve el plan de una descarga segmentada interrumpida de la misma URL.
+
+    Returns:
+        tuple or None: (tamaño_total, validador) si existe un '.part' segmentado reanudable.
+    """
+    metadata = load_part_metadata(part_path)
+    if metadata.get("url") != file_url or "segments" not in metadata or not os.path.exists(part_path):
+        return None
+    return metadata["total_size"], metadata["validator"]
+
+
+def _plan_segments(total_size, segment_count):
+    segment_size = -(-total_size // segment_count)
+    return [
+        [start, min(start + segment_size, total_size) - 1, 0]
+        for start in range(0, total_size, segment_size)
+    ]
+
+
+def segmented_download_to_part(http, file_url, part_path, total_size, validator,
+                               segment_count=DEFAULT_SEGMENT_COUNT, timeout=30, chunk_size=65536,
+                               file_info=None, rate_limiter=None):
+    """
+    Descarga un archivo grande pidiendo 'segment_count' rangos de bytes en paralelo.
+    Cada segmento se escribe en su desplazamiento dentro de un '.part' preasignado.
+
+    El progreso de cada segmento se guarda en los metadatos del '.part' al terminar o
+    fallar, de modo que un reintento solo vuelve a pedir los bytes que faltan. Todas las
+    peticiones llevan If-Range: si el recurso cambió, el plan se descarta. Un plan
+    reanudado con más segmentos que 'segment_count' nunca abre más de 'segment_count'
+    peticiones a la vez.
+
+    Args:
+        http: La sesión (o el módulo requests) con la que hacer las peticiones.
+        file_url (str): La URL del archivo.
+        part_path (str): La ruta del archivo parcial.
+        total_size (int): Tamaño total anunciado por el servidor.
+        validator (str): ETag o Last-Modified usado en If-Range.
+        segment_count (int): Número máximo de rangos descargados simultáneamente.
+        timeout (int): Tiempo de espera de cada petición en segundos.
+        chunk_size (int): Tamaño de los bloques leídos de cada respuesta.
+        file_info (dict): Si se indica, se rellena con 'etag', 'size' y 'sha256'. Como los
+            segmentos llegan desordenados, el hash se calcula al terminar, leyendo el archivo.
+        rate_limiter (HostRateLimiter): Si se indica, cada petición de rango espera su
+            permiso del host, igual que el resto de peticiones.
+    """
+    metadata = load_part_metadata(part_path)
+    resumable = (
+        metadata.get("url") == file_url and metadata.get("validator") == validator
+        and metadata.get("total_size") == total_size and "segments" in metadata
+        and os.path.exists(part_path)
+    )
+    if resumable:
+        segments = metadata["segments"]
+        print(f"  Reanudando descarga segmentada de {file_url}")
+    else:
+        discard_part_file(part_path)
+        segments = _plan_segments(total_size, segment_count)
+        with open(part_path, 'wb') as f:
+            f.truncate(total_size)
+        metadata = {"url": file_url, "validator": validator, "total_size": total_size, "segments": segments}
+        save_part_metadata(part_path, metadata)
+        print(f"  Descarga segmentada en {len(segments)} partes ({total_size} bytes): {file_url}")
+
+    metadata_lock = threading.Lock()
+
+    def fetch_segment(segment):
+        start, end, done = segment
+        if start + done > end:
+            return
+        headers = {
+            "Range": f"bytes={start + done}-{end}",
+            "If-Range": validator,
+            "Accept-Encoding": "identity",
+        }
+        try:
+            if rate_limiter is not None:
+                rate_limiter.acquire(file_url)
+            with http.get(file_url, stream=True, timeout=timeout, headers=headers) as r:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    # If-Range falló: el recurso cambió y los bytes ya escritos no sirven.
+                    discard_part_file(part_path)
+                    raise requests.exceptions.RequestException(
+                        f"El servidor no respetó el rango solicitado para {file_url}"
+                    )
+                # Un rango distinto o un cuerpo multipart/byteranges corrompería el '.part'.
+                # Los demás segmentos siguen siendo válidos: solo se reintenta este.
+                if not r.headers.get("Content-Range", "").startswith(f"bytes {start + done}-"):
+                    raise requests.exceptions.RequestException(
+                        f"Content-Range inesperado en un segmento de {file_url}: {r.headers.get('Content-Range')}"
+                    )
+                with open(part_path, 'r+b') as f:
+                    f.seek(start + done)
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        # Nunca se escribe más allá del final del segmento.
+                        chunk = chunk[:end + 1 - (start + done)]
+                        f.write(chunk)
+                        done += len(chunk)
+                        if start + done > end:
+                            break
+        finally:
+            segment[2] = done
+            if os.path.exists(part_path):
+                with metadata_lock:
+                    save_part_metadata(part_path, metadata)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(segments), segment_count))) as executor:
+        futures = [executor.submit(fetch_segment, segment) for segment in segments]
+        for future in futures:
+            future.result()
+
+    if any(start + done <= end for start, end, done in segments):
+        raise requests.exceptions.ChunkedEncodingError(f"Descarga segmentada incompleta de {file_url}")
+
+    if file_info is not None:
+        file_info["etag"] = validator if validator.startswith('"') else None
+        file_info["size"] = total_size
+        file_info["sha256"] = update_hash_from_file(hashlib.sha256(), part_path).hexdigest()
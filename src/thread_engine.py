@@ -0,0 +1,128 @@
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_HOST_CONCURRENCY = 2
+
+
+class HostLimitedExecutor:
+    """
+    Pool de hilos con un límite global de trabajadores y un límite de tareas
+    simultáneas por host. Las tareas de un host saturado esperan en su propia cola
+    sin ocupar trabajadores, de modo que los demás hosts siguen avanzando.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, host_concurrency=None,
+                 default_host_concurrency=DEFAULT_HOST_CONCURRENCY):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self._host_concurrency = host_concurrency or {}
+        self._default_host_concurrency = max(1, default_host_concurrency)
+        self._lock = threading.Lock()
+        self._all_done = threading.Condition(self._lock)
+        self._queues = defaultdict(deque)
+        self._active = defaultdict(int)
+        self._pending = 0
+
+    def _host_limit(self, host):
+        return max(1, self._host_concurrency.get(host, self._default_host_concurrency))
+
+    def submit(self, url, func, *args):
+        """
+        Encola func(*args) bajo el límite del host de 'url'.
+
+        Args:
+            url (str): URL cuyo host determina el límite aplicable.
+            func (callable): La tarea a ejecutar.
+        """
+        host = urlparse(url).hostname or ""
+        with self._lock:
+            self._pending += 1
+            self._queues[host].append((func, args))
+            self._dispatch(host)
+
+    def _dispatch(self, host):
+        # Debe llamarse con self._lock adquirido.
+        queue = self._queues[host]
+        while queue and self._active[host] < self._host_limit(host):
+            func, args = queue.popleft()
+            self._active[host] += 1
+            self._executor.submit(self._run, host, func, args)
+
+    def _run(self, host, func, args):
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"  Ocurrió un error inesperado en una tarea de descarga para {host}: {e}")
+        finally:
+            with self._lock:
+                self._active[host] -= 1
+                self._pending -= 1
+                self._dispatch(host)
+                if not self._pending:
+                    self._all_done.notify_all()
+
+    def wait(self):
+        """Bloquea hasta que todas las tareas encoladas hayan terminado."""
+        with self._lock:
+            while self._pending:
+                self._all_done.wait()
+
+    def shutdown(self):
+        """Espera a las tareas pendientes y libera los hilos del pool."""
+        self.wait()
+        self._executor.shutdown(wait=True)
+
+
+def run_thread_pool_engine(target_urls, fetch_links, download, finalize, should_download,
+                           max_workers=DEFAULT_MAX_WORKERS, host_concurrency=None,
+                           default_host_concurrency=DEFAULT_HOST_CONCURRENCY, rate_limiter=None):
+    """
+    Recorre las URLs objetivo secuencialmente y reparte las descargas en un pool de hilos,
+    respetando un límite de descargas simultáneas por host. Las descargas de una página
+    continúan en segundo plano mientras se procesa la siguiente.
+
+    Args:
+        target_urls (list): URLs de las páginas a monitorear.
+        fetch_links (callable): fetch_links(url) -> lista de enlaces o None.
+        download (callable): download(link) -> resultado de la descarga.
+        finalize (callable): finalize(link, resultado) organiza y registra el archivo.
+        should_download (callable): should_download(link) -> bool según el historial.
+        max_workers (int): Número global de hilos de descarga.
+        host_concurrency (dict): Límite de descargas simultáneas por host ({host: límite}).
+        default_host_concurrency (int): Límite para los hosts no listados.
+        rate_limiter (HostRateLimiter): Limitador por host aplicado a cada petición. Un trabajador
+            solo espera permisos de su propio host, cuyo número de ranuras está acotado.
+    """
+    executor = HostLimitedExecutor(max_workers, host_concurrency, default_host_concurrency)
+    # La organización y el historial no son seguros entre hilos; se serializan.
+    finalize_lock = threading.Lock()
+    scheduled_links = set()
+
+    def download_link(link):
+        # Cada URL tiene su propio '.part' y el nombre final se reserva de forma atómica,
+        # así que dos enlaces con el mismo nombre de archivo pueden descargarse a la vez.
+        if rate_limiter is not None:
+            rate_limiter.acquire(link)
+        download_result = download(link)
+        with finalize_lock:
+            finalize(link, download_result)
+
+    try:
+        for url in target_urls:
+            print(f"\n--- Procesando URL: {url} ---")
+            if rate_limiter is not None:
+                rate_limiter.acquire(url)
+            for link in fetch_links(url) or []:
+                if link in scheduled_links:
+                    continue
+                with finalize_lock:
+                    pending = should_download(link)
+                if not pending:
+                    print(f"    Archivo ya descargado (o en historial): {link}. Saltando.")
+                    continue
+                scheduled_links.add(link)
+                executor.submit(link, download_link, link)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,90 @@
+import heapq
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_POLL_INTERVAL_SECONDS = 3600
+MIN_POLL_INTERVAL_SECONDS = 1
+
+
+def resolve_poll_intervals(target_urls, watch_config):
+    """
+    Calcula el intervalo de consulta de cada URL objetivo a partir de la sección 'watch'.
+
+    Args:
+        target_urls (list): Las URLs objetivo.
+        watch_config (dict): {'default_interval_seconds': N, 'intervals': {url: N, ...}}.
+
+    Returns:
+        dict: URL -> intervalo en segundos (nunca menor que MIN_POLL_INTERVAL_SECONDS).
+    """
+    default_interval = watch_config.get("default_interval_seconds", DEFAULT_POLL_INTERVAL_SECONDS)
+    url_intervals = watch_config.get("intervals", {})
+    return {
+        url: max(MIN_POLL_INTERVAL_SECONDS, url_intervals.get(url, default_interval))
+        for url in target_urls
+    }
+
+
+def stop_on_termination_signal(stop_event):
+    """
+    Hace que SIGTERM termine el modo vigilancia de forma ordenada (tras la consulta
+    en curso) en lugar de matar el proceso. Solo tiene efecto en el hilo principal.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def handle_signal(signum, frame):
+        print("\nSeñal de terminación recibida. Se detendrá la vigilancia al terminar la consulta en curso.")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+
+
+def run_watch_loop(target_urls, poll_urls, interval_for, stop_event, initial_delay_for=None):
+    """
+    Consulta cada URL objetivo periódicamente, cada una con su propio intervalo.
+
+    Las próximas consultas se guardan en un montículo ordenado por vencimiento: el bucle
+    duerme hasta la primera, procesa juntas todas las URLs vencidas y las vuelve a
+    programar. Si una consulta tarda más que el intervalo, la siguiente se programa
+    desde el final de la consulta en lugar de acumular retrasos.
+
+    Args:
+        target_urls (list): Las URLs objetivo.
+        poll_urls (callable): poll_urls(urls) procesa una tanda de URLs vencidas.
+        interval_for (callable): interval_for(url) -> segundos hasta la siguiente consulta.
+            Se llama tras cada consulta, así que el intervalo puede cambiar entre consultas.
+        stop_event (threading.Event): Detiene el bucle cuando se activa.
+        initial_delay_for (callable): initial_delay_for(url) -> segundos hasta la primera
+            consulta. Por defecto, todas las URLs se consultan al arrancar.
+    """
+    now = time.monotonic()
+    schedule = [
+        (now + (initial_delay_for(url) if initial_delay_for else 0), index, url)
+        for index, url in enumerate(target_urls)
+    ]
+    heapq.heapify(schedule)
+
+    while schedule and not stop_event.is_set():
+        wait = schedule[0][0] - time.monotonic()
+        if wait > 0:
+            next_poll = datetime.now() + timedelta(seconds=wait)
+            print(f"\nPróxima consulta: {schedule[0][2]} a las {next_poll:%H:%M:%S}.")
+            if stop_event.wait(wait):
+                break
+
+        now = time.monotonic()
+        due = []
+        while schedule and schedule[0][0] <= now:
+            due.append(heapq.heappop(schedule))
+        poll_urls([url for _, _, url in due])
+
+        finished = time.monotonic()
+        for due_time, index, url in due:
+            interval = max(MIN_POLL_INTERVAL_SECONDS, interval_for(url))
+            next_due = due_time + interval
+            if next_due <= finished:
+                next_due = finished + interval
+            heapq.heappush(schedule, (next_due, index, url))
@@ -0,0 +1,60 @@
+from bloom_filter import BLOOM_HEADER, BloomFilter
+from history_store import CompactHistoryStore, open_bloom_filter, url_fingerprint
+
+
+def test_bloom_filter_create_load_round_trip(tmp_path):
+    bloom_path = str(tmp_path / "history.bloom")
+    fingerprints = [url_fingerprint(f"https://example.com/{i}.pdf") for i in range(2000)]
+
+    bloom_filter = BloomFilter.create(bloom_path, 5000, 0.01)
+    for fingerprint in fingerprints:
+        bloom_filter.add(fingerprint)
+    bloom_filter.flush(len(fingerprints))
+    bit_count, hash_count = bloom_filter.bit_count, bloom_filter.hash_count
+    bloom_filter.close()
+
+    loaded = BloomFilter.load(bloom_path)
+    try:
+        assert (loaded.bit_count, loaded.hash_count, loaded.item_count) == (bit_count, hash_count, 2000)
+        # Un filtro de Bloom nunca da falsos negativos.
+        assert all(loaded.might_contain(fingerprint) for fingerprint in fingerprints)
+        absent = [url_fingerprint(f"https://example.com/otro{i}.pdf") for i in range(2000)]
+        false_positives = sum(loaded.might_contain(fingerprint) for fingerprint in absent)
+        assert false_positives < 2000 * 0.05
+    finally:
+        loaded.close()
+
+
+def test_bloom_filter_load_rejects_invalid_files(tmp_path):
+    assert BloomFilter.load(str(tmp_path / "no_existe.bloom")) is None
+
+    empty_path = tmp_path / "vacio.bloom"
+    empty_path.write_bytes(b"")
+    assert BloomFilter.load(str(empty_path)) is None
+
+    truncated_path = str(tmp_path / "truncado.bloom")
+    BloomFilter.create(truncated_path, 1000).close()
+    with open(truncated_path, 'r+b') as f:
+        f.truncate(BLOOM_HEADER.size + 1)
+    assert BloomFilter.load(truncated_path) is None
+
+
+def test_open_bloom_filter_rebuilds_when_history_changes(tmp_path):
+    table_path = str(tmp_path / "history.fp64")
+    bloom_path = str(tmp_path / "history.bloom")
+    store = CompactHistoryStore(table_path)
+    store.import_urls([f"https://example.com/{i}.zip" for i in range(10)])
+
+    bloom_filter = open_bloom_filter(store, bloom_path)
+    assert bloom_filter.item_count == 10
+    bloom_filter.close()
+
+    # El historial creció sin el filtro: el filtro guardado ya no coincide y se reconstruye.
+    store.import_urls(["https://example.com/nuevo.zip"])
+    bloom_filter = open_bloom_filter(store, bloom_path)
+    try:
+        assert bloom_filter.item_count == 11
+        assert bloom_filter.might_contain(url_fingerprint("https://example.com/nuevo.zip"))
+    finally:
+        bloom_filter.close()
+        store.close()
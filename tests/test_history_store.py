@@ -0,0 +1,64 @@
+import os
+from array import array
+
+import history_store
+from history_store import CompactHistoryStore, url_fingerprint
+
+
+def test_compact_history_round_trip(tmp_path):
+    table_path = str(tmp_path / "history.fp64")
+    urls = [f"https://example.com/archivo{i}.pdf" for i in range(1000)]
+
+    store = CompactHistoryStore(table_path)
+    for url in urls[:600]:
+        store.add(url)
+    store.save()
+    for url in urls[600:]:
+        store.add(url)
+    store.save()
+    store.close()
+
+    # La tabla en disco queda ordenada, sin duplicados y con 8 bytes por URL.
+    table = array('Q')
+    with open(table_path, 'rb') as f:
+        table.frombytes(f.read())
+    assert list(table) == sorted({url_fingerprint(url) for url in urls})
+    assert os.path.getsize(table_path) == 8 * len(urls)
+
+    reopened = CompactHistoryStore(table_path)
+    try:
+        assert len(reopened) == len(urls)
+        assert all(url in reopened for url in urls)
+        assert "https://example.com/otro.pdf" not in reopened
+    finally:
+        reopened.close()
+
+
+def test_compact_history_add_existing_url_is_not_duplicated(tmp_path):
+    table_path = str(tmp_path / "history.fp64")
+    store = CompactHistoryStore(table_path)
+    store.import_urls(["https://example.com/a.pdf", "https://example.com/b.pdf"])
+    store.add("https://example.com/a.pdf")
+    assert len(store) == 2
+    store.save()
+    store.close()
+    assert os.path.getsize(table_path) == 16
+
+
+def test_compact_history_iter_fingerprints_survives_save(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "TABLE_BLOCK_SIZE", 7)
+    table_path = str(tmp_path / "history.fp64")
+    urls = [f"https://example.com/{i}.zip" for i in range(60)]
+    store = CompactHistoryStore(table_path)
+    store.import_urls(urls[:40])
+    for url in urls[40:]:
+        store.add(url)
+
+    fingerprints = store.iter_fingerprints()
+    seen = [next(fingerprints) for _ in range(30)]
+    # save() sustituye la tabla proyectada mientras se recorre la anterior.
+    store.save()
+    seen.extend(fingerprints)
+    store.close()
+
+    assert set(seen) == {url_fingerprint(url) for url in urls}
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from resumable import load_part_metadata, save_part_metadata, stream_to_part_file
+from segmented import pending_segmented_download, segmented_download_to_part
+
+BODY = os.urandom(64 * 1024)
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Sirve self.server.body con Range / If-Range y fallos configurables."""
+
+    def do_GET(self):
+        server = self.server
+        body = server.body
+        range_header = self.headers.get("Range")
+        server.ranges.append(range_header)
+        if_range = self.headers.get("If-Range")
+        if not range_header or (if_range is not None and if_range != server.etag):
+            self._send(200, body, {})
+            return
+        start_text, end_text = range_header[len("bytes="):].split("-")
+        start = int(start_text)
+        end = min(int(end_text) if end_text else len(body) - 1, len(body) - 1)
+        if start >= len(body):
+            self._send(416, b"", {"Content-Range": f"bytes */{len(body)}"})
+            return
+        shifted_start = start + server.content_range_shift
+        self._send(206, body[start:end + 1], {"Content-Range": f"bytes {shifted_start}-{end}/{len(body)}"})
+
+    def _send(self, status, payload, headers):
+        self.send_response(status)
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        cut_after = self.server.cut_after
+        if cut_after is not None and status == 206:
+            # Corta la conexión a mitad del cuerpo, como una red que se cae.
+            self.wfile.write(payload[:cut_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    server.body = BODY
+    server.etag = '"v1"'
+    server.ranges = []
+    server.content_range_shift = 0
+    server.cut_after = None
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/archivo.bin"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as http:
+        yield http
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_segmented_download_resumes_from_part_metadata(origin, session, tmp_path):
+    part_path = str(tmp_path / "archivo.part")
+    origin.cut_after = 5000
+    with pytest.raises(requests.exceptions.RequestException):
+        segmented_download_to_part(session, origin.url, part_path, len(BODY), origin.etag,
+                                   segment_count=4, chunk_size=1024)
+
+    segments = load_part_metadata(part_path)["segments"]
+    assert len(segments) == 4
+    assert all(0 < done < end + 1 - start for start, end, done in segments)
+    assert pending_segmented_download(part_path, origin.url) == (len(BODY), origin.etag)
+
+    origin.cut_after = None
+    origin.ranges.clear()
+    file_info = {}
+    segmented_download_to_part(session, origin.url, part_path, len(BODY), origin.etag,
+                               segment_count=4, chunk_size=1024, file_info=file_info)
+
+    # Cada segmento solo vuelve a pedir los bytes que le faltaban.
+    assert sorted(origin.ranges) == sorted(f"bytes={start + done}-{end}" for start, end, done in segments)
+    assert read_file(part_path) == BODY
+    assert file_info == {"etag": origin.etag, "size": len(BODY), "sha256": hashlib.sha256(BODY).hexdigest()}
+
+
+def test_segmented_download_discards_plan_when_if_range_fails(origin, session, tmp_path):
+    part_path = str(tmp_path / "archivo.part")
+    origin.cut_after = 5000
+    with pytest.raises(requests.exceptions.RequestException):
+        segmented_download_to_part(session, origin.url, part_path, len(BODY), origin.etag,
+                                   segment_count=4, chunk_size=1024)
+
+    # El recurso cambió: If-Range no coincide, el servidor responde 200 y el plan se descarta.
+    origin.cut_after = None
+    origin.etag = '"v2"'
+    with pytest.raises(requests.exceptions.RequestException):
+        segmented_download_to_part(session, origin.url, part_path, len(BODY), '"v1"',
+                                   segment_count=4, chunk_size=1024)
+    assert not os.path.exists(part_path)
+    assert pending_segmented_download(part_path, origin.url) is None
+
+    segmented_download_to_part(session, origin.url, part_path, len(BODY), origin.etag,
+                               segment_count=4, chunk_size=1024)
+    assert read_file(part_path) == BODY
+
+
+def test_segmented_download_rejects_unexpected_content_range(origin, session, tmp_path):
+    part_path = str(tmp_path / "archivo.part")
+    origin.content_range_shift = 1
+    with pytest.raises(requests.exceptions.RequestException, match="Content-Range"):
+        segmented_download_to_part(session, origin.url, part_path, len(BODY), origin.etag,
+                                   segment_count=4, chunk_size=1024)
+    # Ningún byte de una respuesta desalineada llega al '.part'.
+    assert all(done == 0 for _, _, done in load_part_metadata(part_path)["segments"])
+
+    origin.content_range_shift = 0
+    segmented_download_to_part(session, origin.url, part_path, len(BODY), origin.etag,
+                               segment_count=4, chunk_size=1024)
+    assert read_file(part_path) == BODY
+
+
+def test_stream_to_part_file_resumes_with_range(origin, session, tmp_path):
+    part_path = str(tmp_path / "archivo.part")
+    with open(part_path, 'wb') as f:
+        f.write(BODY[:10000])
+    save_part_metadata(part_path, {"url": origin.url, "validator": origin.etag})
+
+    file_info = {}
+    assert stream_to_part_file(session, origin.url, part_path, file_info=file_info) is None
+    assert origin.ranges == ["bytes=10000-"]
+    assert read_file(part_path) == BODY
+    assert file_info["sha256"] == hashlib.sha256(BODY).hexdigest()
+
+
+def test_stream_to_part_file_starts_over_after_416(origin, session, tmp_path):
+    part_path = str(tmp_path / "archivo.part")
+    with open(part_path, 'wb') as f:
+        f.write(BODY + b"sobrante")
+    save_part_metadata(part_path, {"url": origin.url, "validator": origin.etag})
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        stream_to_part_file(session, origin.url, part_path)
+    assert not os.path.exists(part_path)
+
+    assert stream_to_part_file(session, origin.url, part_path) is None
+    assert origin.ranges == [f"bytes={len(BODY) + len(b'sobrante')}-", None]
+    assert read_file(part_path) == BODY